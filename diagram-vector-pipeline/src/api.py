@@ -1,13 +1,44 @@
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.responses import PlainTextResponse, Response
+from contextlib import asynccontextmanager
 from pathlib import Path
+import os
+import subprocess
 import tempfile
 
+from . import warmup
 from .convert_drawio_to_svg import convert_drawio_to_svg
 from .convert_svg_to_emf import convert_svg_to_emf   # <-- senin dosyan
+from .render_cache import RenderCache
+from .shared_cache import DiskCache, code_version
+from .text_layout import get_registry
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # With src.server the master has already warmed up before forking.
+    warmup.start_background_warm_up()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def cache_version() -> str:
+    """Outputs and revisions depend on the renderer code and the installed fonts."""
+    return f"{code_version()}{get_registry().fingerprint}"
+
+
+# Finished conversions keyed by the uploaded bytes, shared by all workers.
+shared_cache = DiskCache(version=cache_version)
+
+# Last rendered revision per diagram id, so repeated saves of the same
+# diagram only re-render the cells that changed. Revisions are shared
+# through their own disk cache (any worker may receive the next save), so
+# they never evict finished outputs.
+revision_cache = DiskCache(name="revisions", max_bytes=128 * 1024 * 1024, version=cache_version)
+render_cache = RenderCache(store=revision_cache)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,25 +51,48 @@ app.add_middleware(
 
 @app.get("/health", response_class=PlainTextResponse)
 def health():
+    if not warmup.is_ready():
+        return PlainTextResponse("warming up", status_code=503)
     return "OK"
 
 
+@app.get("/health/details")
+def health_details():
+    state = warmup.state
+    return {
+        "ready": state.ready,
+        "startup_seconds": state.startup_seconds,
+        "phases": state.phases,
+        "tools": state.tools,
+        "error": state.error,
+        "pid": os.getpid(),
+        "render_cache": render_cache.stats(),
+    }
+
+
 @app.post("/convert/svg")
 async def convert_svg(file: UploadFile = File(...)):
+    data = await file.read()
+    cached = shared_cache.get(f"svg:{file.filename}", data)
+    if cached is not None:
+        print(f"[api] SVG cache hit for {file.filename}")
+        return Response(content=cached, media_type="image/svg+xml")
+
     tmpdir = Path(tempfile.mkdtemp(prefix="drawio-"))
     input_path = tmpdir / file.filename
     output_svg = tmpdir / "output.svg"
-
-    input_path.write_bytes(await file.read())
+    input_path.write_bytes(data)
     print(f"[api] Received {input_path}")
 
-    ok = convert_drawio_to_svg(input_path, output_svg)
+    ok = convert_drawio_to_svg(input_path, output_svg, render_cache=render_cache)
     print(f"[api] convert_drawio_to_svg -> {ok}, exists={output_svg.exists()}")
 
     if not ok or not output_svg.exists():
         raise HTTPException(status_code=500, detail="SVG conversion failed")
 
-    return Response(content=output_svg.read_bytes(), media_type="image/svg+xml")
+    svg_content = output_svg.read_bytes()
+    shared_cache.put(f"svg:{file.filename}", data, svg_content)
+    return Response(content=svg_content, media_type="image/svg+xml")
 
 
 @app.post("/convert/png")
@@ -47,13 +101,16 @@ async def convert_png(file: UploadFile = File(...)):
     Convert DrawIO to PNG using LibreOffice.
     Useful for quick preview before EMF conversion.
     """
-    import subprocess
-    
+    data = await file.read()
+    cached = shared_cache.get(f"png:{file.filename}", data)
+    if cached is not None:
+        print(f"[api] PNG cache hit for {file.filename}")
+        return Response(content=cached, media_type="image/png")
+
     tmpdir = Path(tempfile.mkdtemp(prefix="drawio-"))
     input_path = tmpdir / file.filename
     output_png = tmpdir / "output.png"
-
-    input_path.write_bytes(await file.read())
+    input_path.write_bytes(data)
     print(f"[api] Received {input_path} for PNG conversion")
 
     # Use LibreOffice to convert DrawIO to PNG
@@ -79,7 +136,8 @@ async def convert_png(file: UploadFile = File(...)):
     
     png_content = png_files[0].read_bytes()
     print(f"[api] PNG conversion success: {len(png_content)} bytes")
-    
+    shared_cache.put(f"png:{file.filename}", data, png_content)
+
     return Response(content=png_content, media_type="image/png")
 
 
@@ -90,17 +148,24 @@ async def convert_emf(file: UploadFile = File(...)):
     2) svg -> emf
     3) emf dosyasını client’a gönder
     """
+    # Aynı diyagram daha önce dönüştürüldüyse (herhangi bir worker'da) hazır EMF'i dön
+    data = await file.read()
+    cached = shared_cache.get(f"emf:{file.filename}", data)
+    if cached is not None:
+        print(f"[api] EMF cache hit for {file.filename}")
+        return Response(content=cached, media_type="image/emf")
+
     tmpdir = Path(tempfile.mkdtemp(prefix="drawio-"))
     input_path = tmpdir / file.filename
     svg_path = tmpdir / "output.svg"
     emf_path = tmpdir / "output.emf"
 
     # Gelen drawio dosyasını geçici klasöre yaz
-    input_path.write_bytes(await file.read())
+    input_path.write_bytes(data)
     print(f"[api] Received {input_path}")
 
     # 1) drawio → svg
-    ok_svg = convert_drawio_to_svg(input_path, svg_path)
+    ok_svg = convert_drawio_to_svg(input_path, svg_path, render_cache=render_cache)
     print(f"[api] convert_drawio_to_svg -> {ok_svg}, exists={svg_path.exists()}")
     if not ok_svg:
         raise HTTPException(status_code=500, detail="SVG conversion failed")
@@ -112,4 +177,6 @@ async def convert_emf(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail="EMF conversion failed")
 
     # 3) Dönüş: EMF binary
-    return Response(content=emf_path.read_bytes(), media_type="image/emf")
+    emf_content = emf_path.read_bytes()
+    shared_cache.put(f"emf:{file.filename}", data, emf_content)
+    return Response(content=emf_content, media_type="image/emf")
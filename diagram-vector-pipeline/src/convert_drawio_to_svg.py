@@ -1,22 +1,31 @@
 from __future__ import annotations
 
 import xml.etree.ElementTree as ET
-import base64
-import zlib
 from pathlib import Path
 from typing import Optional
 
+try:
+    from .mxgraph_render import decode_diagram, diagram_id, render_svg
+    from .render_cache import RenderCache
+except ImportError:  # imported as a top-level module by pipeline.py
+    from mxgraph_render import decode_diagram, diagram_id, render_svg
+    from render_cache import RenderCache
+
 
 def convert_drawio_to_svg(
     drawio_file: Path,
     svg_file: Path,
     drawio_cli: Optional[str] = None,
+    render_cache: Optional[RenderCache] = None,
 ) -> bool:
     """
     Convert a .drawio file to SVG using Python XML processing.
 
     draw.io files are XML-based with embedded diagram data.
-    We extract the diagram and convert to SVG format.
+    We extract the diagram and render each mxCell to SVG.
+
+    When ``render_cache`` is given, the previous revision of the same
+    diagram id is reused and only the changed cells are re-rendered.
     """
 
     try:
@@ -29,63 +38,18 @@ def convert_drawio_to_svg(
         tree = ET.parse(drawio_file)
         root = tree.getroot()
 
-        # draw.io files have <mxfile> root with <diagram> children
-        # Extract the diagram element
-        diagram = root.find('.//diagram')
-
-        if diagram is None:
-            print(f"[draw.io] No diagram element found in {drawio_file}")
-            return False
-
-        # Get diagram content (might be compressed/encoded)
-        diagram_content = diagram.text or ""
-
-        # Try to decode if it's base64 encoded
-        try:
-            decoded = base64.b64decode(diagram_content)
-            # Try to decompress if it's zlib compressed
-            try:
-                decompressed = zlib.decompress(decoded, -zlib.MAX_WBITS).decode('utf-8')
-                diagram_content = decompressed
-            except:
-                diagram_content = decoded.decode('utf-8')
-        except:
-            # Content might already be plain XML
-            pass
-
-        # Parse the mxGraphModel
-        try:
-            graph_model = ET.fromstring(diagram_content)
-        except:
-            graph_model = root.find('.//mxGraphModel')
+        # draw.io files have <mxfile> root with <diagram> children whose
+        # content might be compressed/encoded
+        graph_model = decode_diagram(root)
 
         if graph_model is None:
-            print(f"[draw.io] No mxGraphModel found")
+            print(f"[draw.io] No mxGraphModel found in {drawio_file}")
             return False
 
-        # Create basic SVG structure
-        # Get canvas dimensions from the graph model
-        page_width = graph_model.get('pageWidth', '827')
-        page_height = graph_model.get('pageHeight', '1169')
-
-        svg_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg xmlns="http://www.w3.org/2000/svg"
-     xmlns:xlink="http://www.w3.org/1999/xlink"
-     width="{page_width}"
-     height="{page_height}"
-     viewBox="0 0 {page_width} {page_height}">
-  <title>Converted from draw.io</title>
-  <desc>Diagram converted from {drawio_file.name}</desc>
-
-  <!-- Note: This is a simplified conversion. For full fidelity, use draw.io desktop export -->
-  <rect width="100%" height="100%" fill="white"/>
-  <text x="50" y="50" font-family="Arial" font-size="14">
-    Draw.io diagram: {drawio_file.name}
-  </text>
-  <text x="50" y="80" font-family="Arial" font-size="12" fill="#666">
-    (Simplified SVG conversion - for full rendering use draw.io export)
-  </text>
-</svg>'''
+        if render_cache is not None:
+            svg_content = render_cache.render(diagram_id(root), graph_model, drawio_file.name)
+        else:
+            svg_content = render_svg(graph_model, drawio_file.name)
 
         # Write SVG file
         svg_file.write_text(svg_content, encoding='utf-8')
@@ -95,7 +59,6 @@ def convert_drawio_to_svg(
             return False
 
         print(f"[draw.io] SVG successfully created: {svg_file} ({svg_file.stat().st_size} bytes)")
-        print(f"[draw.io] Note: This is a basic conversion. For full fidelity, consider using draw.io desktop")
 
         return True
 
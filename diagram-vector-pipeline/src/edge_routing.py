@@ -0,0 +1,442 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Bounds are (x, y, width, height) in absolute page coordinates.
+Bounds = Tuple[float, float, float, float]
+Point = Tuple[float, float]
+
+NORTH: Point = (0.0, -1.0)
+EAST: Point = (1.0, 0.0)
+SOUTH: Point = (0.0, 1.0)
+WEST: Point = (-1.0, 0.0)
+
+# Route cost weights: occupied grid cells crossed dominate, then U-turns,
+# then bends, then length.
+HIT_COST = 1000.0
+REVERSAL_COST = 1000.0
+BEND_COST = 20.0
+
+# Lane candidates scored at once when rerouting blocked edges.
+_LANE_BATCH = 200_000
+
+
+class Port(NamedTuple):
+    point: Point
+    direction: Point  # unit vector pointing out of the terminal
+
+
+class RouteRequest(NamedTuple):
+    source: Bounds  # axis-aligned bounds of the (possibly rotated) terminals
+    target: Bounds
+    source_port: Port
+    target_port: Port
+
+
+def _rotate(point: Point, center: Point, degrees: float) -> Point:
+    angle = math.radians(degrees)
+    cos, sin = math.cos(angle), math.sin(angle)
+    dx, dy = point[0] - center[0], point[1] - center[1]
+    return center[0] + dx * cos - dy * sin, center[1] + dx * sin + dy * cos
+
+
+def rotated_bounds(bounds: Bounds, rotation: float) -> Bounds:
+    """Axis-aligned bounding box of ``bounds`` rotated about its center."""
+    if rotation % 180 == 0:
+        return bounds
+    x, y, w, h = bounds
+    center = (x + w / 2, y + h / 2)
+    corners = [_rotate(p, center, rotation) for p in ((x, y), (x + w, y), (x, y + h), (x + w, y + h))]
+    xs = [p[0] for p in corners]
+    ys = [p[1] for p in corners]
+    return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+
+def _side(fx: float, fy: float) -> Point:
+    distances = ((fy, NORTH), (1 - fx, EAST), (1 - fy, SOUTH), (fx, WEST))
+    return min(distances, key=lambda item: item[0])[1]
+
+
+def resolve_port(
+    bounds: Bounds,
+    rotation: float,
+    constraint: Optional[Tuple[float, float, float, float]],
+    toward: Point,
+) -> Port:
+    """
+    Port of an edge terminal.
+
+    ``constraint`` is a draw.io perimeter constraint (``exitX``, ``exitY``,
+    ``exitDx``, ``exitDy``) relative to the unrotated shape; the port and its
+    direction are rotated with the shape. Without a constraint the port is
+    the middle of the side of the rotated bounding box facing ``toward``.
+    """
+    x, y, w, h = bounds
+    center = (x + w / 2, y + h / 2)
+    if constraint is None:
+        x, y, w, h = rotated_bounds(bounds, rotation)
+        dx, dy = toward[0] - center[0], toward[1] - center[1]
+        if abs(dx) >= abs(dy):
+            return Port((x + w, center[1]), EAST) if dx >= 0 else Port((x, center[1]), WEST)
+        return Port((center[0], y + h), SOUTH) if dy >= 0 else Port((center[0], y), NORTH)
+
+    fx, fy, offset_x, offset_y = constraint
+    point = (x + w * fx + offset_x, y + h * fy + offset_y)
+    direction = _side(fx, fy)
+    if rotation % 360:
+        point = _rotate(point, center, rotation)
+        ddx, ddy = _rotate(direction, (0.0, 0.0), rotation)
+        if abs(ddx) >= abs(ddy):
+            direction = EAST if ddx > 0 else WEST
+        else:
+            direction = SOUTH if ddy > 0 else NORTH
+    return Port(point, direction)
+
+
+class _Grid(NamedTuple):
+    origin_x: float
+    origin_y: float
+    size: float
+    row_sums: np.ndarray  # (H, W + 1) prefix sums of occupied cells along rows
+    col_sums: np.ndarray  # (H + 1, W) prefix sums of occupied cells along columns
+
+
+def _simplify(points: List[Point]) -> List[Point]:
+    """Drop repeated and collinear points of an orthogonal polyline."""
+    result: List[Point] = []
+    for point in points:
+        if result and abs(point[0] - result[-1][0]) < 1e-6 and abs(point[1] - result[-1][1]) < 1e-6:
+            continue
+        if len(result) >= 2:
+            (ax, ay), (bx, by) = result[-2], result[-1]
+            if (abs(ax - bx) < 1e-6 and abs(bx - point[0]) < 1e-6) or (
+                abs(ay - by) < 1e-6 and abs(by - point[1]) < 1e-6
+            ):
+                result[-1] = point
+                continue
+        result.append(point)
+    return result
+
+
+class EdgeRouter:
+    """
+    Batch orthogonal router over an occupancy grid of the diagram's shapes.
+
+    Every edge gets a fixed set of candidate routes (one or two bends via the
+    midpoint, or detours around both terminals); all candidates of all edges
+    are scored at once with NumPy and the cheapest one wins. Edges whose
+    candidates all cross a shape then try lanes through every grid row and
+    column of a growing window around them. Routes are cached by endpoint
+    geometry for as long as the obstacles are unchanged.
+
+    The grid depends on the obstacles only, so a route is the same whichever
+    batch it is computed in. Each route also has an *area*: the bounds of all
+    candidates scored for it, grown by one grid cell. Obstacles that do not
+    overlap the area cannot change the route (see ``affected_by``).
+    """
+
+    def __init__(self, grid_size: float = 10.0, jetty: float = 20.0, max_cells: int = 4_000_000) -> None:
+        self.grid_size = grid_size
+        self.jetty = max(jetty, 1.5 * grid_size)
+        self.max_cells = max_cells
+        self._obstacles_key: Optional[int] = None
+        self._routes: Dict[RouteRequest, Tuple[List[Point], Bounds]] = {}
+
+    def route(self, requests: Sequence[RouteRequest], obstacles: Sequence[Bounds]) -> List[List[Point]]:
+        return self.route_areas(requests, obstacles)[0]
+
+    def route_areas(
+        self, requests: Sequence[RouteRequest], obstacles: Sequence[Bounds]
+    ) -> Tuple[List[List[Point]], List[Bounds]]:
+        """Routes of ``requests`` and the area each of them depends on."""
+        key = hash(tuple(obstacles))
+        if key != self._obstacles_key:
+            self._obstacles_key = key
+            self._routes = {}
+
+        results: List[Optional[Tuple[List[Point], Bounds]]] = [self._routes.get(request) for request in requests]
+        pending = [index for index, result in enumerate(results) if result is None]
+        if pending:
+            batch = [requests[index] for index in pending]
+            for index, result in zip(pending, zip(*self._route_batch(batch, obstacles))):
+                self._routes[requests[index]] = result
+                results[index] = result
+        return [result[0] for result in results], [result[1] for result in results]  # type: ignore[index]
+
+    def cell_size(self, obstacles: Sequence[Bounds]) -> float:
+        """Grid cell size used for ``obstacles`` (doubled for large diagrams)."""
+        return self._layout(np.asarray(obstacles, dtype=float).reshape(-1, 4))[2]
+
+    @staticmethod
+    def affected_by(areas: Sequence[Bounds], changed: Sequence[Bounds]) -> np.ndarray:
+        """
+        Which routes may change after the ``changed`` obstacles (old and new
+        bounds of added, removed or moved shapes), given the ``areas`` from
+        ``route_areas``. Routes whose cell size changed are not covered.
+        """
+        if not len(areas) or not changed:
+            return np.zeros(len(areas), dtype=bool)
+        area = np.asarray(areas, dtype=float).reshape(-1, 4)
+        boxes = np.asarray(changed, dtype=float).reshape(-1, 4)
+        overlap = (
+            (boxes[None, :, 0] <= area[:, None, 0] + area[:, None, 2])
+            & (boxes[None, :, 0] + boxes[None, :, 2] >= area[:, None, 0])
+            & (boxes[None, :, 1] <= area[:, None, 1] + area[:, None, 3])
+            & (boxes[None, :, 1] + boxes[None, :, 3] >= area[:, None, 1])
+        )
+        return overlap.any(axis=1)
+
+    def _layout(self, obstacles: np.ndarray) -> Tuple[float, float, float, int, int]:
+        if not len(obstacles):
+            return 0.0, 0.0, float(self.grid_size), 0, 0
+        min_x, min_y = obstacles[:, 0].min(), obstacles[:, 1].min()
+        max_x, max_y = (obstacles[:, 0] + obstacles[:, 2]).max(), (obstacles[:, 1] + obstacles[:, 3]).max()
+        size = self.grid_size
+        while True:
+            # Offset by half a cell so coordinates on the diagram grid fall on
+            # cell centers and routes along a shape's border do not hit it.
+            # The border cells are empty, so segments clipped to the grid
+            # (routes leaving the obstacles' extent) are scored correctly.
+            origin_x = math.floor(min_x / size) * size - size - size / 2
+            origin_y = math.floor(min_y / size) * size - size - size / 2
+            width = int(math.ceil((max_x - origin_x) / size)) + 2
+            height = int(math.ceil((max_y - origin_y) / size)) + 2
+            if width * height <= self.max_cells:
+                return origin_x, origin_y, size, width, height
+            size *= 2
+
+    def _grid(self, obstacles: np.ndarray) -> Optional[_Grid]:
+        origin_x, origin_y, size, width, height = self._layout(obstacles)
+        if not width:
+            return None
+
+        # Cells whose centers lie strictly inside an obstacle are occupied.
+        x0, y0 = obstacles[:, 0], obstacles[:, 1]
+        x1, y1 = x0 + obstacles[:, 2], y0 + obstacles[:, 3]
+        c0 = np.clip(np.floor((x0 - origin_x) / size - 0.5).astype(np.int64) + 1, 0, width)
+        c1 = np.clip(np.ceil((x1 - origin_x) / size - 0.5).astype(np.int64) - 1, -1, width - 1)
+        r0 = np.clip(np.floor((y0 - origin_y) / size - 0.5).astype(np.int64) + 1, 0, height)
+        r1 = np.clip(np.ceil((y1 - origin_y) / size - 0.5).astype(np.int64) - 1, -1, height - 1)
+        valid = (c1 >= c0) & (r1 >= r0)
+        c0, c1, r0, r1 = c0[valid], c1[valid], r0[valid], r1[valid]
+
+        diff = np.zeros((height + 1, width + 1), dtype=np.int32)
+        np.add.at(diff, (r0, c0), 1)
+        np.add.at(diff, (r0, c1 + 1), -1)
+        np.add.at(diff, (r1 + 1, c0), -1)
+        np.add.at(diff, (r1 + 1, c1 + 1), 1)
+        occupied = (diff.cumsum(axis=0).cumsum(axis=1)[:height, :width] > 0).astype(np.int32)
+
+        row_sums = np.zeros((height, width + 1), dtype=np.int32)
+        row_sums[:, 1:] = occupied.cumsum(axis=1)
+        col_sums = np.zeros((height + 1, width), dtype=np.int32)
+        col_sums[1:, :] = occupied.cumsum(axis=0)
+        return _Grid(origin_x, origin_y, size, row_sums, col_sums)
+
+    @staticmethod
+    def _hits(grid: _Grid, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """Occupied cells crossed by axis-aligned segments ``start -> end``."""
+        height, width = grid.col_sums.shape[0] - 1, grid.row_sums.shape[1] - 1
+        col_a = np.clip(np.floor((start[..., 0] - grid.origin_x) / grid.size).astype(np.int64), 0, width - 1)
+        col_b = np.clip(np.floor((end[..., 0] - grid.origin_x) / grid.size).astype(np.int64), 0, width - 1)
+        row_a = np.clip(np.floor((start[..., 1] - grid.origin_y) / grid.size).astype(np.int64), 0, height - 1)
+        row_b = np.clip(np.floor((end[..., 1] - grid.origin_y) / grid.size).astype(np.int64), 0, height - 1)
+
+        col_lo, col_hi = np.minimum(col_a, col_b), np.maximum(col_a, col_b)
+        row_lo, row_hi = np.minimum(row_a, row_b), np.maximum(row_a, row_b)
+        horizontal = grid.row_sums[row_a, col_hi + 1] - grid.row_sums[row_a, col_lo]
+        vertical = grid.col_sums[row_hi + 1, col_a] - grid.col_sums[row_lo, col_a]
+        is_horizontal = np.abs(end[..., 1] - start[..., 1]) < 1e-9
+        return np.where(is_horizontal, horizontal, vertical)
+
+    @staticmethod
+    def _paths(
+        source_port: np.ndarray,
+        s: np.ndarray,
+        ax: np.ndarray,
+        ay: np.ndarray,
+        bx: np.ndarray,
+        by: np.ndarray,
+        t: np.ndarray,
+        target_port: np.ndarray,
+    ) -> np.ndarray:
+        """Candidate routes source port -> s -> a -> b -> t -> target port, (edges, candidates, 6, 2)."""
+        candidates = ax.shape[1]
+        return np.stack(
+            [
+                np.repeat(source_port[:, None, :], candidates, axis=1),
+                np.repeat(s[:, None, :], candidates, axis=1),
+                np.stack([ax, ay], axis=-1),
+                np.stack([bx, by], axis=-1),
+                np.repeat(t[:, None, :], candidates, axis=1),
+                np.repeat(target_port[:, None, :], candidates, axis=1),
+            ],
+            axis=2,
+        )
+
+    def _score(self, grid: Optional[_Grid], path: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Occupied cells crossed by and cost of each candidate in ``path``."""
+        start, end = path[:, :, :-1], path[:, :, 1:]
+        vectors = end - start
+
+        # The stubs (first and last segment) start inside the terminals.
+        if grid is None:
+            hits = np.zeros(path.shape[:2])
+        else:
+            hits = self._hits(grid, start[:, :, 1:4], end[:, :, 1:4]).sum(axis=2)
+        length = np.abs(vectors).sum(axis=(2, 3))
+
+        direction = np.sign(vectors)
+        moving = np.abs(vectors).sum(axis=3) > 1e-9
+        previous = direction[:, :, 0]
+        bends = np.zeros(hits.shape)
+        reversals = np.zeros(hits.shape)
+        for index in range(1, vectors.shape[2]):
+            current = direction[:, :, index]
+            step = moving[:, :, index]
+            turned = step & np.any(current != previous, axis=-1)
+            backwards = step & ((current * previous).sum(axis=-1) < 0)
+            bends += turned
+            reversals += backwards
+            previous = np.where(step[..., None], current, previous)
+
+        return hits, hits * HIT_COST + reversals * REVERSAL_COST + bends * BEND_COST + length
+
+    def _route_batch(
+        self, requests: Sequence[RouteRequest], obstacles: Sequence[Bounds]
+    ) -> Tuple[List[List[Point]], List[Bounds]]:
+        jetty = self.jetty
+        source_port = np.array([r.source_port.point for r in requests], dtype=float)
+        source_dir = np.array([r.source_port.direction for r in requests], dtype=float)
+        target_port = np.array([r.target_port.point for r in requests], dtype=float)
+        target_dir = np.array([r.target_port.direction for r in requests], dtype=float)
+        source_box = np.array([r.source for r in requests], dtype=float)
+        target_box = np.array([r.target for r in requests], dtype=float)
+
+        # Leave each terminal along its port direction before turning.
+        s = source_port + source_dir * jetty
+        t = target_port + target_dir * jetty
+        xs, ys, xt, yt = s[:, 0], s[:, 1], t[:, 0], t[:, 1]
+        mid_x, mid_y = (xs + xt) / 2, (ys + yt) / 2
+        left = np.minimum(source_box[:, 0], target_box[:, 0]) - jetty
+        right = np.maximum(source_box[:, 0] + source_box[:, 2], target_box[:, 0] + target_box[:, 2]) + jetty
+        top = np.minimum(source_box[:, 1], target_box[:, 1]) - jetty
+        bottom = np.maximum(source_box[:, 1] + source_box[:, 3], target_box[:, 1] + target_box[:, 3]) + jetty
+
+        # Candidates s -> a -> b -> t: HV, VH, HVH and VHV through the
+        # midpoint, and HVH/VHV detours around both terminals.
+        ax = np.stack([xt, xs, mid_x, xs, left, right, xs, xs], axis=1)
+        ay = np.stack([ys, yt, ys, mid_y, ys, ys, top, bottom], axis=1)
+        bx = np.stack([xt, xs, mid_x, xt, left, right, xt, xt], axis=1)
+        by = np.stack([ys, yt, yt, mid_y, yt, yt, top, bottom], axis=1)
+        path = self._paths(source_port, s, ax, ay, bx, by, t, target_port)
+
+        grid = self._grid(np.asarray(obstacles, dtype=float).reshape(-1, 4))
+        size = grid.size if grid is not None else self.grid_size
+        hits, cost = self._score(grid, path)
+        edges = np.arange(len(requests))
+        best = np.argmin(cost, axis=1)
+        chosen, hits, cost = path[edges, best], hits[edges, best], cost[edges, best]
+
+        # A cell counts as hit when the segment passes through it and the
+        # obstacle covers its center, so obstacles up to one cell away from a
+        # scored segment matter.
+        scored = path[:, :, 1:5]
+        low = scored.min(axis=(1, 2)) - size
+        high = scored.max(axis=(1, 2)) + size
+        blocked = np.flatnonzero(hits > 0)
+        if grid is not None and len(blocked):
+            self._detour(grid, blocked, source_port, s, t, target_port, chosen, cost, low, high)
+        areas = np.concatenate([low, high - low], axis=1).tolist()
+        return [_simplify([tuple(point) for point in route]) for route in chosen.tolist()], [
+            tuple(area) for area in areas
+        ]
+
+    def _detour(
+        self,
+        grid: _Grid,
+        edges: np.ndarray,
+        source_port: np.ndarray,
+        s: np.ndarray,
+        t: np.ndarray,
+        target_port: np.ndarray,
+        chosen: np.ndarray,
+        cost: np.ndarray,
+        low: np.ndarray,
+        high: np.ndarray,
+    ) -> None:
+        """
+        Reroute ``edges`` whose candidates all cross a shape through a lane
+        (HVH via any grid row, VHV via any grid column) inside a window of
+        grid cells around their area. The window grows until the cheapest
+        lane is clear or the window covers the grid; lanes outside the grid
+        cannot beat the ones along its empty border, so the result only
+        depends on the window. ``chosen``, ``cost``, ``low`` and ``high``
+        (the areas) are updated in place.
+        """
+        size = grid.size
+        height, width = grid.col_sums.shape[0] - 1, grid.row_sums.shape[1] - 1
+        c0 = np.floor((low[edges, 0] - grid.origin_x) / size).astype(np.int64)
+        c1 = np.floor((high[edges, 0] - grid.origin_x) / size).astype(np.int64)
+        r0 = np.floor((low[edges, 1] - grid.origin_y) / size).astype(np.int64)
+        r1 = np.floor((high[edges, 1] - grid.origin_y) / size).astype(np.int64)
+        while len(edges):
+            paths, hits, costs = self._lanes(grid, source_port[edges], s[edges], t[edges], target_port[edges], c0, c1, r0, r1)
+            better = costs < cost[edges]
+            chosen[edges[better]] = paths[better]
+            cost[edges[better]] = costs[better]
+            low[edges, 0] = np.minimum(low[edges, 0], grid.origin_x + (c0 - 1) * size)
+            low[edges, 1] = np.minimum(low[edges, 1], grid.origin_y + (r0 - 1) * size)
+            high[edges, 0] = np.maximum(high[edges, 0], grid.origin_x + (c1 + 2) * size)
+            high[edges, 1] = np.maximum(high[edges, 1], grid.origin_y + (r1 + 2) * size)
+
+            covers = (c0 <= 0) & (r0 <= 0) & (c1 >= width - 1) & (r1 >= height - 1)
+            more = (hits > 0) & ~covers
+            pad = np.maximum(c1 - c0, r1 - r0)[more] + 1
+            edges, c0, c1, r0, r1 = edges[more], c0[more] - pad, c1[more] + pad, r0[more] - pad, r1[more] + pad
+
+    def _lanes(
+        self,
+        grid: _Grid,
+        source_port: np.ndarray,
+        s: np.ndarray,
+        t: np.ndarray,
+        target_port: np.ndarray,
+        c0: np.ndarray,
+        c1: np.ndarray,
+        r0: np.ndarray,
+        r1: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Cheapest lane route of each edge within its window, with its hits and cost."""
+        rows, cols = r1 - r0 + 1, c1 - c0 + 1
+        count = rows + cols
+        paths = np.empty((len(s), 6, 2))
+        hits = np.empty(len(s))
+        costs = np.empty(len(s))
+        step = max(1, _LANE_BATCH // int(count.max()))
+        for first in range(0, len(s), step):
+            part = slice(first, first + step)
+            lane = np.arange(int(count[part].max()))[None, :]
+            horizontal = lane < rows[part, None]
+            y = grid.origin_y + (r0[part, None] + lane + 0.5) * grid.size
+            x = grid.origin_x + (c0[part, None] + lane - rows[part, None] + 0.5) * grid.size
+            xs, ys, xt, yt = s[part, 0, None], s[part, 1, None], t[part, 0, None], t[part, 1, None]
+            path = self._paths(
+                source_port[part],
+                s[part],
+                np.where(horizontal, xs, x),
+                np.where(horizontal, y, ys),
+                np.where(horizontal, xt, x),
+                np.where(horizontal, y, yt),
+                t[part],
+                target_port[part],
+            )
+            lane_hits, cost = self._score(grid, path)
+            cost = np.where(lane < count[part, None], cost, np.inf)
+            best = np.argmin(cost, axis=1)
+            index = np.arange(len(best))
+            paths[part], hits[part], costs[part] = path[index, best], lane_hits[index, best], cost[index, best]
+        return paths, hits, costs
@@ -0,0 +1,676 @@
+from __future__ import annotations
+
+import base64
+import html
+import math
+import zlib
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+
+try:
+    from .edge_routing import EdgeRouter, RouteRequest, resolve_port, rotated_bounds
+    from .text_layout import layout_label, svg_text
+except ImportError:  # imported as a top-level module by pipeline.py
+    from edge_routing import EdgeRouter, RouteRequest, resolve_port, rotated_bounds
+    from text_layout import layout_label, svg_text
+
+# Bounds are (x, y, width, height) in absolute page coordinates.
+Bounds = Tuple[float, float, float, float]
+Point = Tuple[float, float]
+
+# Cells with one of these tags wrap the real <mxCell> and carry the label.
+_WRAPPER_TAGS = ("object", "UserObject")
+
+
+class Cell:
+    """
+    A parsed mxCell with the attributes the renderer needs.
+
+    ``signature`` holds the tags and attributes of the cell element and all
+    of its descendants (wrapper, geometry, waypoints); revisions are diffed
+    on it.
+    """
+
+    __slots__ = (
+        "id",
+        "parent",
+        "source",
+        "target",
+        "vertex",
+        "edge",
+        "value",
+        "style",
+        "geometry",
+        "relative",
+        "points",
+        "source_point",
+        "target_point",
+        "offset",
+        "signature",
+    )
+
+    def __init__(
+        self,
+        element: ET.Element,
+        cell: ET.Element,
+        value: str,
+        signature: Optional[tuple] = None,
+    ) -> None:
+        self.id = element.get("id", "")
+        self.parent = cell.get("parent")
+        self.source = cell.get("source")
+        self.target = cell.get("target")
+        self.vertex = cell.get("vertex") == "1"
+        self.edge = cell.get("edge") == "1"
+        self.value = value
+        self.style = parse_style(cell.get("style", ""))
+        self.geometry: Optional[Bounds] = None
+        self.relative = False
+        self.points: List[Point] = []
+        self.source_point: Optional[Point] = None
+        self.target_point: Optional[Point] = None
+        self.offset: Point = (0.0, 0.0)
+        self.signature = signature if signature is not None else cell_signature(element)
+
+        geo = cell.find("mxGeometry")
+        if geo is None:
+            return
+        self.relative = geo.get("relative") == "1"
+        self.geometry = (
+            float(geo.get("x", 0)),
+            float(geo.get("y", 0)),
+            float(geo.get("width", 0)),
+            float(geo.get("height", 0)),
+        )
+        for child in geo:
+            role = child.get("as")
+            if child.tag == "Array" and role == "points":
+                self.points = [_point(p) for p in child.findall("mxPoint")]
+            elif child.tag == "mxPoint" and role == "sourcePoint":
+                self.source_point = _point(child)
+            elif child.tag == "mxPoint" and role == "targetPoint":
+                self.target_point = _point(child)
+            elif child.tag == "mxPoint" and role == "offset":
+                self.offset = _point(child)
+
+
+def _point(element: ET.Element) -> Point:
+    return float(element.get("x", 0)), float(element.get("y", 0))
+
+
+def cell_signature(element: ET.Element) -> tuple:
+    return tuple((node.tag, tuple(node.attrib.items())) for node in element.iter())
+
+
+def parse_style(style: str) -> Dict[str, str]:
+    """
+    Parse a draw.io style string (``key=value;...``).
+
+    A leading bare token such as ``ellipse`` or ``text`` is a named base
+    style; it is stored under ``shape`` unless the style sets one explicitly.
+    """
+    result: Dict[str, str] = {}
+    for index, token in enumerate(style.split(";")):
+        if not token:
+            continue
+        key, sep, value = token.partition("=")
+        if sep:
+            result[key] = value
+        elif index == 0:
+            result.setdefault("shape", key)
+    return result
+
+
+def decode_diagram(root: ET.Element) -> Optional[ET.Element]:
+    """
+    Return the first mxGraphModel of a parsed .drawio document.
+
+    Diagram content is either stored inline or as base64 + raw deflate
+    (+ URL encoding, in newer draw.io versions).
+    """
+    diagram = root.find(".//diagram")
+    if diagram is None:
+        return root.find(".//mxGraphModel")
+
+    model = diagram.find("mxGraphModel")
+    if model is not None:
+        return model
+
+    content = (diagram.text or "").strip()
+    if not content:
+        return None
+    try:
+        data = zlib.decompress(base64.b64decode(content), -zlib.MAX_WBITS).decode("utf-8")
+        return ET.fromstring(unquote(data))
+    except Exception:
+        pass
+    try:
+        return ET.fromstring(content)
+    except ET.ParseError:
+        return None
+
+
+def diagram_id(root: ET.Element) -> Optional[str]:
+    diagram = root.find(".//diagram")
+    return diagram.get("id") if diagram is not None else None
+
+
+def parse_cells(
+    graph_model: ET.Element,
+    previous: Optional[Dict[str, Cell]] = None,
+) -> Dict[str, Cell]:
+    """
+    Return the cells of a graph model keyed by id, in document (z) order.
+
+    Cells whose signature is unchanged from ``previous`` are reused as-is.
+    """
+    cells: Dict[str, Cell] = {}
+    root = graph_model.find("root")
+    if root is None:
+        return cells
+    previous = previous or {}
+    for element in root:
+        if element.tag == "mxCell":
+            inner = element
+        elif element.tag in _WRAPPER_TAGS:
+            inner = element.find("mxCell")
+            if inner is None:
+                continue
+        else:
+            continue
+        signature = cell_signature(element)
+        old = previous.get(element.get("id", ""))
+        if old is not None and old.signature == signature:
+            cells[old.id] = old
+            continue
+        value = element.get("value", "") if inner is element else element.get("label", "")
+        cell = Cell(element, inner, value, signature)
+        cells[cell.id] = cell
+    return cells
+
+
+def absolute_bounds(
+    cell_id: Optional[str],
+    cells: Dict[str, Cell],
+    memo: Dict[str, Optional[Bounds]],
+) -> Optional[Bounds]:
+    """
+    Absolute bounds of a vertex; child geometry is relative to its parent.
+
+    Layers and the root cell have no geometry and contribute no offset.
+    """
+    if cell_id is None:
+        return None
+    if cell_id in memo:
+        return memo[cell_id]
+    cell = cells.get(cell_id)
+    bounds: Optional[Bounds] = None
+    if cell is not None and cell.geometry is not None and not cell.edge:
+        x, y, w, h = cell.geometry
+        ox, oy = parent_origin(cell, cells, memo)
+        bounds = (x + ox, y + oy, w, h)
+    memo[cell_id] = bounds
+    return bounds
+
+
+def parent_origin(
+    cell: Cell,
+    cells: Dict[str, Cell],
+    memo: Dict[str, Optional[Bounds]],
+) -> Point:
+    parent = absolute_bounds(cell.parent, cells, memo)
+    if parent is None:
+        return 0.0, 0.0
+    return parent[0], parent[1]
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def _color(style: Dict[str, str], key: str, default: str) -> str:
+    value = style.get(key, default)
+    if value == "default":
+        return default
+    return html.escape(value, quote=True)
+
+
+def _attr(style: Dict[str, str], key: str, default: str) -> str:
+    return html.escape(style.get(key, default), quote=True)
+
+
+def _paint(style: Dict[str, str], fill_default: str) -> str:
+    fill = _color(style, "fillColor", fill_default)
+    stroke = _color(style, "strokeColor", "#000000")
+    width = _attr(style, "strokeWidth", "1")
+    attrs = f'fill="{fill}" stroke="{stroke}" stroke-width="{width}"'
+    if style.get("dashed") == "1":
+        attrs += ' stroke-dasharray="3 3"'
+    if "opacity" in style:
+        attrs += f' opacity="{float(style["opacity"]) / 100:g}"'
+    return attrs
+
+
+def _render_label(cell: Cell, bounds: Bounds) -> str:
+    """
+    Lay out a cell's label in its label box.
+
+    The box is the cell bounds, shifted by one width/height when
+    ``labelPosition``/``verticalLabelPosition`` place the label outside the
+    shape, and inset by the ``spacing*`` styles.
+    """
+    if not cell.value:
+        return ""
+    style = cell.style
+    x, y, w, h = bounds
+    if style.get("labelPosition") == "left":
+        x -= w
+    elif style.get("labelPosition") == "right":
+        x += w
+    if style.get("verticalLabelPosition") == "top":
+        y -= h
+    elif style.get("verticalLabelPosition") == "bottom":
+        y += h
+
+    # Edge labels get a zero-sized box centered on the label position.
+    spacing = float(style.get("spacing", 2)) if w or h else 0.0
+    spacing_left = spacing + float(style.get("spacingLeft", 0))
+    spacing_top = spacing + float(style.get("spacingTop", 0))
+    left = x + spacing_left
+    top = y + spacing_top
+    width = max(w - spacing_left - spacing - float(style.get("spacingRight", 0)), 0.0)
+    height = max(h - spacing_top - spacing - float(style.get("spacingBottom", 0)), 0.0)
+
+    family = style.get("fontFamily", "Helvetica")
+    size = float(style.get("fontSize", 12))
+    wrap = style.get("whiteSpace") == "wrap" and w > 0
+    layout = layout_label(
+        cell.value,
+        family,
+        size,
+        width if wrap else None,
+        style.get("html") == "1",
+        int(style.get("fontStyle", 0) or 0),
+    )
+
+    valign = style.get("verticalAlign", "middle")
+    if valign == "top":
+        block_top = top
+    elif valign == "bottom":
+        block_top = top + height - layout.height
+    else:
+        block_top = top + (height - layout.height) / 2
+
+    return svg_text(
+        layout,
+        left,
+        block_top,
+        width,
+        style.get("align", "center"),
+        family,
+        size,
+        _color(style, "fontColor", "#000000"),
+    )
+
+
+def _render_vertex(cell: Cell, bounds: Bounds) -> str:
+    style = cell.style
+    shape = style.get("shape", "rectangle")
+    x, y, w, h = bounds
+    parts: List[str] = []
+
+    if shape in ("text", "label") and "fillColor" not in style and "strokeColor" not in style:
+        pass
+    elif shape in ("edgeLabel", "group"):
+        pass  # only the label (if any) is drawn
+    elif shape == "ellipse":
+        parts.append(
+            f'<ellipse cx="{_fmt(x + w / 2)}" cy="{_fmt(y + h / 2)}" '
+            f'rx="{_fmt(w / 2)}" ry="{_fmt(h / 2)}" {_paint(style, "#ffffff")}/>'
+        )
+    elif shape == "rhombus":
+        points = (
+            f"{_fmt(x + w / 2)},{_fmt(y)} {_fmt(x + w)},{_fmt(y + h / 2)} "
+            f"{_fmt(x + w / 2)},{_fmt(y + h)} {_fmt(x)},{_fmt(y + h / 2)}"
+        )
+        parts.append(f'<polygon points="{points}" {_paint(style, "#ffffff")}/>')
+    elif shape.startswith("mxgraph."):
+        # Stencil shapes are not bundled; draw their outline so the layout
+        # stays readable.
+        parts.append(
+            f'<rect x="{_fmt(x)}" y="{_fmt(y)}" width="{_fmt(w)}" height="{_fmt(h)}" '
+            f'fill="none" stroke="{_color(style, "strokeColor", "#000000")}" '
+            f'stroke-width="{_attr(style, "strokeWidth", "1")}"/>'
+        )
+    else:
+        rounded = ""
+        if style.get("rounded") == "1":
+            rounded = f' rx="{_fmt(min(w, h) * float(style.get("arcSize", 15)) / 100)}"'
+        parts.append(
+            f'<rect x="{_fmt(x)}" y="{_fmt(y)}" width="{_fmt(w)}" height="{_fmt(h)}"'
+            f'{rounded} {_paint(style, "#ffffff")}/>'
+        )
+
+    rotation = _rotation(cell)
+    transform = ""
+    if rotation:
+        transform = f' transform="rotate({_fmt(rotation)} {_fmt(x + w / 2)} {_fmt(y + h / 2)})"'
+
+    parts.append(_render_label(cell, bounds))
+    return f'<g data-cell-id="{html.escape(cell.id, quote=True)}"{transform}>{"".join(parts)}</g>'
+
+
+def _perimeter_point(bounds: Bounds, toward: Point) -> Point:
+    """Intersection of the line from the bounds' center to ``toward`` with its border."""
+    x, y, w, h = bounds
+    cx, cy = x + w / 2, y + h / 2
+    dx, dy = toward[0] - cx, toward[1] - cy
+    if dx == 0 and dy == 0:
+        return cx, cy
+    scale = min(
+        (w / 2) / abs(dx) if dx else math.inf,
+        (h / 2) / abs(dy) if dy else math.inf,
+    )
+    return cx + dx * scale, cy + dy * scale
+
+
+def _rotation(cell: Cell) -> float:
+    return float(cell.style.get("rotation", 0) or 0)
+
+
+def _port_constraint(style: Dict[str, str], prefix: str) -> Optional[Tuple[float, float, float, float]]:
+    if f"{prefix}X" not in style or f"{prefix}Y" not in style:
+        return None
+    return (
+        float(style[f"{prefix}X"]),
+        float(style[f"{prefix}Y"]),
+        float(style.get(f"{prefix}Dx", 0)),
+        float(style.get(f"{prefix}Dy", 0)),
+    )
+
+
+def _constraint_point(
+    cell_id: str,
+    bounds: Bounds,
+    cells: Dict[str, Cell],
+    style: Dict[str, str],
+    prefix: str,
+) -> Optional[Point]:
+    constraint = _port_constraint(style, prefix)
+    if constraint is None:
+        return None
+    return resolve_port(bounds, _rotation(cells[cell_id]), constraint, _center(bounds)).point
+
+
+def edge_route(
+    cell: Cell,
+    cells: Dict[str, Cell],
+    memo: Dict[str, Optional[Bounds]],
+) -> List[Point]:
+    """
+    Polyline of an edge: source port, waypoints, target port.
+
+    Terminals without a perimeter constraint are clipped to the terminal's
+    bounding box in the direction of the adjacent point.
+    """
+    ox, oy = parent_origin(cell, cells, memo)
+    waypoints = [(px + ox, py + oy) for px, py in cell.points]
+
+    source = absolute_bounds(cell.source, cells, memo)
+    target = absolute_bounds(cell.target, cells, memo)
+
+    start = _constraint_point(cell.source, source, cells, cell.style, "exit") if source else None
+    end = _constraint_point(cell.target, target, cells, cell.style, "entry") if target else None
+    if source is None and cell.source_point is not None:
+        start = (cell.source_point[0] + ox, cell.source_point[1] + oy)
+    if target is None and cell.target_point is not None:
+        end = (cell.target_point[0] + ox, cell.target_point[1] + oy)
+
+    if start is None and source is not None:
+        toward = waypoints[0] if waypoints else end
+        if toward is None and target is not None:
+            toward = _center(target)
+        start = _perimeter_point(source, toward) if toward else _center(source)
+    if end is None and target is not None:
+        toward = waypoints[-1] if waypoints else start
+        end = _perimeter_point(target, toward) if toward else _center(target)
+
+    route = waypoints
+    if start is not None:
+        route = [start] + route
+    if end is not None:
+        route = route + [end]
+    return route
+
+
+def _center(bounds: Bounds) -> Point:
+    return bounds[0] + bounds[2] / 2, bounds[1] + bounds[3] / 2
+
+
+def _arrow_head(tail: Point, tip: Point, size: float, color: str, filled: bool) -> str:
+    dx, dy = tip[0] - tail[0], tip[1] - tail[1]
+    length = math.hypot(dx, dy)
+    if length == 0:
+        return ""
+    ux, uy = dx / length, dy / length
+    bx, by = tip[0] - ux * size, tip[1] - uy * size
+    half = size / 2.5
+    points = (
+        f"{_fmt(tip[0])},{_fmt(tip[1])} "
+        f"{_fmt(bx - uy * half)},{_fmt(by + ux * half)} "
+        f"{_fmt(bx + uy * half)},{_fmt(by - ux * half)}"
+    )
+    fill = color if filled else "none"
+    return f'<polygon points="{points}" fill="{fill}" stroke="{color}"/>'
+
+
+def point_on_route(route: List[Point], gx: float, gy: float, offset: Point = (0.0, 0.0)) -> Point:
+    """
+    Label position on an edge, as in mxGraphView.getPoint: ``gx`` in [-1, 1]
+    runs from the source to the target end along the polyline, ``gy`` is
+    the distance from it (to the left of the direction of travel is
+    negative) and ``offset`` is added in page units.
+    """
+    segments = [math.hypot(bx - ax, by - ay) for (ax, ay), (bx, by) in zip(route, route[1:])]
+    distance = round((gx / 2 + 0.5) * sum(segments))
+    covered = 0.0
+    index = 0
+    while index < len(segments) - 1 and distance >= round(covered + segments[index]):
+        covered += segments[index]
+        index += 1
+    segment = segments[index]
+    (ax, ay), (bx, by) = route[index], route[index + 1]
+    factor = (distance - covered) / segment if segment else 0.0
+    nx = (by - ay) / segment if segment else 0.0
+    ny = (bx - ax) / segment if segment else 0.0
+    return (
+        ax + (bx - ax) * factor + nx * gy + offset[0],
+        ay + (by - ay) * factor - ny * gy + offset[1],
+    )
+
+
+def edge_child_bounds(cell: Cell, route: List[Point]) -> Optional[Bounds]:
+    """
+    Bounds of a vertex whose parent is an edge (draw.io edge labels): a
+    relative geometry is positioned along the edge by ``point_on_route``.
+    """
+    if cell.geometry is None or len(route) < 2:
+        return None
+    x, y, w, h = cell.geometry
+    if cell.relative:
+        x, y = point_on_route(route, x, y, cell.offset)
+    return x, y, w, h
+
+
+def _render_edge(cell: Cell, route: List[Point]) -> str:
+    if len(route) < 2:
+        return ""
+    style = cell.style
+    color = _color(style, "strokeColor", "#000000")
+    path = " ".join(f"{_fmt(px)},{_fmt(py)}" for px, py in route)
+    dash = ' stroke-dasharray="3 3"' if style.get("dashed") == "1" else ""
+    parts = [
+        f'<polyline points="{path}" fill="none" stroke="{color}" '
+        f'stroke-width="{_attr(style, "strokeWidth", "1")}"{dash}/>'
+    ]
+
+    end_arrow = style.get("endArrow", "classic")
+    if end_arrow != "none":
+        parts.append(
+            _arrow_head(route[-2], route[-1], float(style.get("endSize", 6)), color,
+                        style.get("endFill", "1") != "0")
+        )
+    start_arrow = style.get("startArrow", "none")
+    if start_arrow != "none":
+        parts.append(
+            _arrow_head(route[1], route[0], float(style.get("startSize", 6)), color,
+                        style.get("startFill", "1") != "0")
+        )
+
+    if cell.value:
+        gx, gy = cell.geometry[:2] if cell.geometry else (0.0, 0.0)
+        mx, my = point_on_route(route, gx, gy, cell.offset)
+        parts.append(_render_label(cell, (mx, my, 0.0, 0.0)))
+
+    return f'<g data-cell-id="{html.escape(cell.id, quote=True)}">{"".join(parts)}</g>'
+
+
+def routing_obstacles(cells: Dict[str, Cell], memo: Dict[str, Optional[Bounds]]) -> List[Bounds]:
+    """Bounding boxes of the vertices edges should avoid (containers excluded)."""
+    containers = {cell.parent for cell in cells.values() if cell.vertex}
+    obstacles: List[Bounds] = []
+    for cell in cells.values():
+        if not cell.vertex or cell.id in containers or cell.style.get("visible") == "0":
+            continue
+        parent = cells.get(cell.parent) if cell.parent else None
+        if parent is not None and parent.edge:
+            continue  # edge label
+        bounds = absolute_bounds(cell.id, cells, memo)
+        if bounds is not None:
+            obstacles.append(rotated_bounds(bounds, _rotation(cell)))
+    return obstacles
+
+
+def orthogonal_requests(
+    edges: Iterable[Cell],
+    cells: Dict[str, Cell],
+    memo: Dict[str, Optional[Bounds]],
+) -> Dict[str, RouteRequest]:
+    """
+    Route requests of the ``edgeStyle=orthogonalEdgeStyle`` edges without
+    waypoints. A dangling end (``sourcePoint``/``targetPoint``) is a terminal
+    of zero size whose port faces the other end.
+    """
+    requests: Dict[str, RouteRequest] = {}
+    for cell in edges:
+        if cell.style.get("edgeStyle") != "orthogonalEdgeStyle" or cell.points:
+            continue
+        if cell.source is not None and cell.source == cell.target:
+            continue
+        source = _terminal(cell.source, cell.source_point, "exit", cell, cells, memo)
+        target = _terminal(cell.target, cell.target_point, "entry", cell, cells, memo)
+        if source is None or target is None:
+            continue
+        (source, source_rotation, exit), (target, target_rotation, entry) = source, target
+        requests[cell.id] = RouteRequest(
+            rotated_bounds(source, source_rotation),
+            rotated_bounds(target, target_rotation),
+            resolve_port(source, source_rotation, exit, _center(target)),
+            resolve_port(target, target_rotation, entry, _center(source)),
+        )
+    return requests
+
+
+def _terminal(
+    terminal: Optional[str],
+    point: Optional[Point],
+    prefix: str,
+    edge: Cell,
+    cells: Dict[str, Cell],
+    memo: Dict[str, Optional[Bounds]],
+) -> Optional[Tuple[Bounds, float, Optional[Tuple[float, float, float, float]]]]:
+    """Bounds, rotation and port constraint of one end of an edge, as in ``edge_route``."""
+    bounds = absolute_bounds(terminal, cells, memo)
+    if bounds is not None:
+        return bounds, _rotation(cells[terminal]), _port_constraint(edge.style, prefix)
+    if point is None:
+        return None
+    ox, oy = parent_origin(edge, cells, memo)
+    return (point[0] + ox, point[1] + oy, 0.0, 0.0), 0.0, None
+
+
+def orthogonal_routes(
+    edges: Iterable[Cell],
+    cells: Dict[str, Cell],
+    memo: Dict[str, Optional[Bounds]],
+    router: EdgeRouter,
+) -> Dict[str, List[Point]]:
+    """
+    Route all ``edgeStyle=orthogonalEdgeStyle`` edges without waypoints in
+    one batch. Returns the full polyline (ports included) per edge id.
+    """
+    requests = orthogonal_requests(edges, cells, memo)
+    if not requests:
+        return {}
+    return dict(zip(requests, router.route(list(requests.values()), routing_obstacles(cells, memo))))
+
+
+def render_cell(
+    cell: Cell,
+    cells: Dict[str, Cell],
+    memo: Dict[str, Optional[Bounds]],
+    routes: Optional[Dict[str, List[Point]]] = None,
+) -> str:
+    """
+    Render a single cell to a self-contained SVG fragment ("" if invisible).
+
+    ``routes`` holds precomputed edge polylines (see ``orthogonal_routes``).
+    """
+    if cell.style.get("visible") == "0" or cell.geometry is None:
+        return ""
+    if cell.edge:
+        route = routes.get(cell.id) if routes else None
+        return _render_edge(cell, route or edge_route(cell, cells, memo))
+    if cell.vertex:
+        parent = cells.get(cell.parent) if cell.parent else None
+        if parent is not None and parent.edge:
+            route = routes.get(parent.id) if routes else None
+            bounds = edge_child_bounds(cell, route or edge_route(parent, cells, memo))
+        else:
+            bounds = absolute_bounds(cell.id, cells, memo)
+        return _render_vertex(cell, bounds) if bounds else ""
+    return ""
+
+
+def render_document(graph_model: ET.Element, title: str, fragments: Iterable[str]) -> str:
+    """Wrap rendered cell fragments into a standalone SVG document."""
+    page_width = graph_model.get("pageWidth", "827")
+    page_height = graph_model.get("pageHeight", "1169")
+    name = html.escape(title)
+    body = "\n  ".join(fragment for fragment in fragments if fragment)
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg"
+     xmlns:xlink="http://www.w3.org/1999/xlink"
+     width="{page_width}"
+     height="{page_height}"
+     viewBox="0 0 {page_width} {page_height}">
+  <title>Converted from draw.io</title>
+  <desc>Diagram converted from {name}</desc>
+  <rect width="100%" height="100%" fill="white"/>
+  {body}
+</svg>'''
+
+
+def grid_size(graph_model: ET.Element) -> float:
+    return float(graph_model.get("gridSize", 10) or 10)
+
+
+def render_svg(graph_model: ET.Element, title: str) -> str:
+    """Render every cell of a graph model (no caching)."""
+    cells = parse_cells(graph_model)
+    memo: Dict[str, Optional[Bounds]] = {}
+    edges = [cell for cell in cells.values() if cell.edge]
+    routes = orthogonal_routes(edges, cells, memo, EdgeRouter(grid_size(graph_model)))
+    fragments = [render_cell(cell, cells, memo, routes) for cell in cells.values()]
+    return render_document(graph_model, title, fragments)
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from .edge_routing import EdgeRouter, RouteRequest
+    from .mxgraph_render import (
+        Bounds,
+        Cell,
+        Point,
+        grid_size,
+        orthogonal_requests,
+        parse_cells,
+        render_cell,
+        render_document,
+        routing_obstacles,
+    )
+    from .shared_cache import DiskCache
+except ImportError:  # imported as a top-level module by pipeline.py
+    from edge_routing import EdgeRouter, RouteRequest
+    from mxgraph_render import (
+        Bounds,
+        Cell,
+        Point,
+        grid_size,
+        orthogonal_requests,
+        parse_cells,
+        render_cell,
+        render_document,
+        routing_obstacles,
+    )
+    from shared_cache import DiskCache
+
+# Signature hashes are only comparable between processes with the same
+# string hash seed (the workers of one server); revisions stored under
+# another seed are ignored.
+_HASH_SEED = hash("render-cache")
+
+
+class _Revision:
+    """
+    Last rendered model of one diagram: parsed cells, their SVG fragments,
+    the area each auto-routed edge's route depends on, the shapes they were
+    routed around and the edge router holding the route cache.
+
+    Revisions loaded from the shared store have no ``cells``, only the
+    signature hash of each cell. ``token`` starts with the render time in
+    nanoseconds, so the newest revision of a diagram wins.
+    """
+
+    __slots__ = ("cells", "hashes", "fragments", "areas", "obstacles", "router", "token")
+
+    def __init__(
+        self,
+        cells: Optional[Dict[str, Cell]],
+        hashes: Optional[Dict[str, int]],
+        fragments: Dict[str, str],
+        areas: Dict[str, Bounds],
+        obstacles: List[Bounds],
+        router: EdgeRouter,
+        token: str,
+    ) -> None:
+        self.cells = cells
+        self.hashes = hashes
+        self.fragments = fragments
+        self.areas = areas
+        self.obstacles = obstacles
+        self.router = router
+        self.token = token
+
+    def dump(self) -> bytes:
+        if self.cells is not None:
+            hashes = {cell_id: hash(cell.signature) for cell_id, cell in self.cells.items()}
+        else:
+            hashes = self.hashes or {}
+        return json.dumps(
+            {
+                "seed": _HASH_SEED,
+                "hashes": hashes,
+                "fragments": self.fragments,
+                "areas": self.areas,
+                "obstacles": self.obstacles,
+                "grid_size": self.router.grid_size,
+                "token": self.token,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    @classmethod
+    def load(cls, data: bytes) -> Optional["_Revision"]:
+        try:
+            state = json.loads(data)
+            if state["seed"] != _HASH_SEED:
+                return None
+            return cls(
+                None,
+                state["hashes"],
+                state["fragments"],
+                {cell_id: tuple(area) for cell_id, area in state["areas"].items()},
+                [tuple(bounds) for bounds in state["obstacles"]],
+                EdgeRouter(state["grid_size"]),
+                state["token"],
+            )
+        except (ValueError, KeyError, TypeError):
+            return None
+
+
+def _newer(token: str, revision: Optional[_Revision]) -> bool:
+    """Whether ``token`` was rendered after ``revision``."""
+    time_ns = int(token.split("-", 1)[0])
+    return revision is None or time_ns > int(revision.token.split("-", 1)[0])
+
+
+def dirty_cells(old: Dict[str, Cell], new: Dict[str, Cell]) -> Set[str]:
+    """
+    Ids of cells in ``new`` whose SVG fragment must be re-rendered.
+
+    ``new`` must come from ``parse_cells(..., previous=old)``, which reuses
+    the ``Cell`` objects of unchanged cells; any other cell is new or its XML
+    changed (geometry, style, value). Children of a dirty cell are dirty
+    because their geometry is relative to it, and edges attached to a dirty
+    or removed cell are dirty because their ports moved (along with their
+    labels, which are children of the edge).
+    """
+    changed = {
+        cell_id
+        for cell_id, cell in new.items()
+        if old.get(cell_id) is not cell
+    }
+    return _close_dirty(new, changed, old.keys() - new.keys())
+
+
+def _close_dirty(new: Dict[str, Cell], changed: Set[str], removed: Iterable[str]) -> Set[str]:
+    """Add the children of ``changed`` cells and the edges of changed or removed cells."""
+    removed = set(removed)
+    if not changed and not removed:
+        return changed
+
+    dirty = _with_children(new, changed)
+    moved = dirty | removed
+    edges = {
+        cell_id
+        for cell_id, cell in new.items()
+        if cell.edge and (cell.source in moved or cell.target in moved)
+    }
+    return dirty | _with_children(new, edges)
+
+
+def _with_children(new: Dict[str, Cell], ids: Iterable[str]) -> Set[str]:
+    """``ids`` and all their descendants in ``new``."""
+    children: Dict[str, List[str]] = {}
+    for cell_id, cell in new.items():
+        if cell.parent is not None:
+            children.setdefault(cell.parent, []).append(cell_id)
+
+    found: Set[str] = set()
+    stack = list(ids)
+    while stack:
+        cell_id = stack.pop()
+        if cell_id in found:
+            continue
+        found.add(cell_id)
+        stack.extend(children.get(cell_id, ()))
+    return found
+
+
+class RenderCache:
+    """
+    Keeps the last rendered revision of each diagram id so the next revision
+    only re-renders changed cells and splices them into the cached output.
+
+    The least recently rendered diagrams are evicted beyond ``max_diagrams``.
+
+    With a ``store`` (the disk cache shared by server workers), every
+    revision is also written there from a background thread, so the next
+    revision of a diagram can be diffed against it whichever worker
+    receives it. ``stats()`` reports where previous revisions came from.
+    """
+
+    def __init__(self, max_diagrams: int = 64, store: Optional[DiskCache] = None) -> None:
+        self.max_diagrams = max_diagrams
+        self.store = store
+        self._revisions: "OrderedDict[str, _Revision]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = {"memory": 0, "shared": 0, "miss": 0}
+        self._pending: "OrderedDict[str, _Revision]" = OrderedDict()
+        self._pending_changed = threading.Condition(self._lock)
+        self._writing = False
+        self._writer_pid: Optional[int] = None
+
+    def _previous(self, diagram_id: Optional[str]) -> Tuple[Optional[_Revision], Optional[_Revision]]:
+        """The newest revision of ``diagram_id`` and the one held in memory."""
+        if not diagram_id:
+            return None, None
+        with self._lock:
+            previous = local = self._revisions.get(diagram_id)
+
+        source = "memory"
+        if self.store is not None:
+            head = self.store.get("render-head", diagram_id.encode("utf-8"))
+            token = head.decode("utf-8") if head is not None else None
+            # Another worker rendered a newer revision than this one holds.
+            if token and _newer(token, previous):
+                data = self.store.get("render-revision", diagram_id.encode("utf-8"))
+                shared = _Revision.load(data) if data is not None else None
+                # The revision may have been replaced since the head was read.
+                if shared is not None and _newer(shared.token, previous):
+                    previous, source = shared, "shared"
+
+        with self._lock:
+            self._hits[source if previous is not None else "miss"] += 1
+        return previous, local
+
+    def render(self, diagram_id: Optional[str], graph_model: ET.Element, title: str) -> str:
+        previous, local = self._previous(diagram_id)
+
+        # Cells are diffed against ``previous``, but a shared revision has no
+        # Cell objects; the ones of an older revision in memory still spare
+        # re-parsing every cell that did not change since then.
+        cells = parse_cells(graph_model, local.cells if local is not None else None)
+
+        size = grid_size(graph_model)
+        router = local.router if local is not None and local.router.grid_size == size else EdgeRouter(size)
+
+        memo: Dict[str, Optional[Bounds]] = {}
+        obstacles = routing_obstacles(cells, memo)
+        if previous is None:
+            requests = orthogonal_requests((c for c in cells.values() if c.edge), cells, memo)
+            routes, areas = self._route(router, requests, obstacles)
+            fragments = {cell_id: render_cell(cell, cells, memo, routes) for cell_id, cell in cells.items()}
+            print(f"[render-cache] {diagram_id}: full render of {len(cells)} cells")
+        else:
+            if previous.cells is not None:
+                dirty = dirty_cells(previous.cells, cells)
+            else:
+                hashes = previous.hashes or {}
+                changed = {cell_id for cell_id, cell in cells.items() if hashes.get(cell_id) != hash(cell.signature)}
+                dirty = _close_dirty(cells, changed, hashes.keys() - cells.keys())
+            # Edges that are not dirty kept both terminals; their routes only
+            # change if a shape that was added, removed or moved overlaps the
+            # area the route depends on, or the router's cell size changed.
+            areas = {
+                cell_id: area
+                for cell_id, area in previous.areas.items()
+                if cell_id in cells and cell_id not in dirty
+            }
+            if obstacles != previous.obstacles:
+                if router.cell_size(obstacles) != router.cell_size(previous.obstacles):
+                    dirty |= _with_children(cells, areas)
+                else:
+                    changed = list(set(obstacles) ^ set(previous.obstacles))
+                    affected = router.affected_by(list(areas.values()), changed)
+                    dirty |= _with_children(cells, (cell_id for cell_id, hit in zip(areas, affected) if hit))
+            # Labels of an edge are placed along its route, so their edge is
+            # routed as well (a clean edge gets its previous route back).
+            routed = {cell_id for cell_id in dirty if cells[cell_id].edge}
+            routed.update(
+                cells[cell_id].parent
+                for cell_id in dirty
+                if cells[cell_id].vertex and cells[cell_id].parent in cells and cells[cells[cell_id].parent].edge
+            )
+            fresh = orthogonal_requests((cells[cell_id] for cell_id in routed), cells, memo)
+            routes, fresh_areas = self._route(router, fresh, obstacles)
+            areas = {cell_id: area for cell_id, area in areas.items() if cell_id not in routed}
+            areas.update(fresh_areas)
+            old_fragments = previous.fragments
+            fragments = {
+                cell_id: render_cell(cell, cells, memo, routes) if cell_id in dirty else old_fragments[cell_id]
+                for cell_id, cell in cells.items()
+            }
+            print(f"[render-cache] {diagram_id}: re-rendered {len(dirty)}/{len(cells)} cells")
+
+        if diagram_id:
+            token = f"{time.time_ns()}-{uuid.uuid4().hex}"
+            revision = _Revision(cells, None, fragments, areas, obstacles, router, token)
+            with self._lock:
+                self._revisions[diagram_id] = revision
+                self._revisions.move_to_end(diagram_id)
+                while len(self._revisions) > self.max_diagrams:
+                    self._revisions.popitem(last=False)
+            if self.store is not None:
+                self._share(diagram_id, revision)
+
+        return render_document(graph_model, title, fragments.values())
+
+    def _share(self, diagram_id: str, revision: _Revision) -> None:
+        with self._lock:
+            # Only the newest revision of each diagram is written.
+            self._pending[diagram_id] = revision
+            self._pending_changed.notify_all()
+            # Threads do not survive fork; start one per worker process.
+            if self._writer_pid != os.getpid():
+                self._writer_pid = os.getpid()
+                threading.Thread(target=self._write_shared, name="render-cache-writer", daemon=True).start()
+
+    def _write_shared(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._pending_changed.wait()
+                diagram_id, revision = self._pending.popitem(last=False)
+                self._writing = True
+            try:
+                # One revision per diagram, replaced in place; the small head
+                # entry lets other workers check for a newer one cheaply.
+                key = diagram_id.encode("utf-8")
+                self.store.put("render-revision", key, revision.dump())
+                self.store.put("render-head", key, revision.token.encode("utf-8"))
+            except Exception as e:
+                print(f"[render-cache] Could not share {diagram_id}: {type(e).__name__}: {e}")
+            with self._lock:
+                self._writing = False
+                self._pending_changed.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until pending revisions are written to the store."""
+        with self._lock:
+            return self._pending_changed.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def stats(self) -> Dict[str, object]:
+        """Where previous revisions came from in this process."""
+        with self._lock:
+            hits = dict(self._hits)
+        total = sum(hits.values())
+        return {
+            "renders": total,
+            "memory_hits": hits["memory"],
+            "shared_hits": hits["shared"],
+            "misses": hits["miss"],
+            "hit_rate": round((hits["memory"] + hits["shared"]) / total, 3) if total else None,
+        }
+
+    @staticmethod
+    def _route(
+        router: EdgeRouter, requests: Dict[str, RouteRequest], obstacles: List[Bounds]
+    ) -> Tuple[Dict[str, List[Point]], Dict[str, Bounds]]:
+        if not requests:
+            return {}, {}
+        routes, areas = router.route_areas(list(requests.values()), obstacles)
+        return dict(zip(requests, routes)), dict(zip(requests, areas))
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import time
+
+# Measure startup from before the conversion modules are imported.
+_STARTED_AT = time.perf_counter()
+
+import argparse
+import contextlib
+import os
+import select
+import signal
+import socket
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+import uvicorn
+
+# A dead worker is replaced after RESTART_DELAY seconds, doubled for every
+# other crash within RESTART_WINDOW. The master gives up when more than
+# MAX_RESTARTS workers die within that window.
+RESTART_DELAY = 1.0
+RESTART_WINDOW = 60.0
+MAX_RESTARTS = 5
+
+# Sent by the master to connections accepted while it warms up.
+_WARMING_UP = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain; charset=utf-8\r\n"
+    b"Content-Length: 10\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"warming up"
+)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+@contextlib.contextmanager
+def answer_unavailable(sock: socket.socket) -> Iterator[None]:
+    """
+    Answer every connection on ``sock`` with ``503 warming up`` while the
+    block runs, so clients and health checks are not left waiting in the
+    listen backlog until the workers start.
+    """
+    done = threading.Event()
+
+    def respond() -> None:
+        while not done.is_set():
+            readable, _, _ = select.select([sock], [], [], 0.1)
+            if not readable:
+                continue
+            try:
+                conn, _addr = sock.accept()
+            except OSError:
+                continue
+            with conn:
+                try:
+                    conn.settimeout(1.0)
+                    conn.recv(65536)
+                    conn.sendall(_WARMING_UP)
+                except OSError:
+                    pass
+
+    thread = threading.Thread(target=respond, name="warming-up", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def _serve(app, sock: socket.socket, log_level: str) -> None:
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(app, sock: socket.socket, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        # Worker: restore default signal handling; uvicorn installs its own.
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        try:
+            _serve(app, sock, log_level)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def run(host: str, port: int, workers: int, log_level: str = "info") -> int:
+    """
+    Warm up once in this process, then pre-fork ``workers`` uvicorn workers
+    that accept on one shared socket. Requests made during warm-up get
+    ``503 warming up`` from this process.
+
+    Workers inherit the imported modules, font tables and warm caches
+    copy-on-write, so they answer /health with 200 as soon as they start.
+    Dead workers are replaced after a growing delay until SIGTERM/SIGINT;
+    if they keep dying, all workers are stopped and 1 is returned.
+    """
+    from . import warmup
+    from .api import app, revision_cache, shared_cache
+
+    sock = bind_socket(host, port)
+    with answer_unavailable(sock):
+        warmup.warm_up(started_at=_STARTED_AT)
+        shared_cache.clear_stale()
+        revision_cache.clear_stale()
+
+    if workers <= 1 or not hasattr(os, "fork"):
+        print(f"[server] Serving on {host}:{port} with a single process")
+        _serve(app, sock, log_level)
+        return 0
+
+    children: Dict[int, int] = {}
+    respawns: List[Tuple[float, int]] = []  # (due time, slot) of dead workers
+    crashes: Deque[float] = deque()
+    stopping = False
+    exit_code = 0
+
+    # Signal handlers only write to this pipe; the loop below waits on it,
+    # so SIGTERM ends a restart delay at once (sleep() would resume).
+    wake_fd, wake_write_fd = os.pipe()
+    os.set_blocking(wake_fd, False)
+    os.set_blocking(wake_write_fd, False)
+
+    def wake(_signum=None, _frame=None) -> None:
+        try:
+            os.write(wake_write_fd, b"\0")
+        except BlockingIOError:
+            pass
+
+    def stop(signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        wake()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGCHLD, wake)
+
+    for slot in range(workers):
+        children[_spawn(app, sock, log_level)] = slot
+    print(
+        f"[server] {workers} workers serving on {host}:{port}; "
+        f"started in {time.perf_counter() - _STARTED_AT:.3f}s"
+    )
+
+    while True:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if not pid:
+                break
+            slot = children.pop(pid, None)
+            if slot is None or stopping:
+                continue
+
+            now = time.monotonic()
+            crashes.append(now)
+            while crashes[0] < now - RESTART_WINDOW:
+                crashes.popleft()
+            if len(crashes) > MAX_RESTARTS:
+                print(
+                    f"[server] Worker {pid} exited with status {status}; {len(crashes)} workers "
+                    f"died within {RESTART_WINDOW:.0f}s, shutting down"
+                )
+                exit_code = 1
+                stop(signal.SIGTERM, None)
+                continue
+
+            delay = RESTART_DELAY * 2 ** (len(crashes) - 1)
+            print(f"[server] Worker {pid} exited with status {status}; restarting in {delay:.1f}s")
+            respawns.append((now + delay, slot))
+
+        if stopping:
+            respawns.clear()
+        now = time.monotonic()
+        for due, slot in sorted(respawns):
+            if due <= now:
+                children[_spawn(app, sock, log_level)] = slot
+        respawns = [(due, slot) for due, slot in respawns if due > now]
+        if not children and not respawns:
+            break
+
+        timeout = min(due for due, _slot in respawns) - now if respawns else None
+        select.select([wake_fd], [], [], timeout)
+        try:
+            os.read(wake_fd, 4096)
+        except BlockingIOError:
+            pass
+
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    os.close(wake_fd)
+    os.close(wake_write_fd)
+    sock.close()
+    return exit_code
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Production server: warm up once, then pre-fork uvicorn workers.",
+    )
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "9000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("DIAGRAM_WORKERS", "0")) or os.cpu_count() or 1,
+        help="Number of worker processes (default: DIAGRAM_WORKERS or CPU count).",
+    )
+    parser.add_argument("--log-level", default=os.environ.get("LOG_LEVEL", "info").lower())
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    raise SystemExit(run(args.host, args.port, args.workers, args.log_level))
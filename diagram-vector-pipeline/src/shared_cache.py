@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+# Version directories (``v-<hash>``); clear_stale() removes nothing else.
+_VERSION_DIR = re.compile(r"v-[0-9a-f]+")
+
+
+def default_cache_dir() -> Path:
+    """Directory owned by the caches, inside ``DIAGRAM_CACHE_DIR`` or the temp directory."""
+    base = os.environ.get("DIAGRAM_CACHE_DIR") or tempfile.gettempdir()
+    return Path(base) / "diagram-vector-cache"
+
+
+def code_version() -> str:
+    """Hash of this package's sources; any code change invalidates the cache."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(__file__).resolve().parent.glob("*.py")):
+        digest.update(path.name.encode("utf-8") + b"\0" + path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class DiskCache:
+    """
+    Conversion results shared by all worker processes, keyed by a hash of
+    the uploaded diagram.
+
+    Entries are plain files written atomically (temp file + rename), so
+    workers can read them concurrently without locking. When the directory
+    grows beyond ``max_bytes`` the least recently used entries are removed.
+
+    Each cache owns ``root`` (``<directory>/<name>``) and keeps its entries
+    in a ``v-<version>`` subdirectory of it, so outputs of an older renderer
+    (or font set) are never served after an upgrade even if the directory
+    survives restarts. ``version`` is called on first use; it defaults to
+    ``code_version``.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        name: str = "outputs",
+        max_bytes: int = 256 * 1024 * 1024,
+        prune_every: int = 64,
+        version: Optional[Callable[[], str]] = None,
+    ) -> None:
+        self.root = (directory if directory is not None else default_cache_dir()) / name
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self._version = version if version is not None else code_version
+        self._directory: Optional[Path] = None
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        if self._directory is None:
+            self._directory = self.root / f"v-{self._version()}"
+        return self._directory
+
+    @staticmethod
+    def key(kind: str, data: bytes) -> str:
+        return hashlib.sha256(kind.encode("utf-8") + b"\0" + data).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get(self, kind: str, data: bytes) -> Optional[bytes]:
+        path = self._path(self.key(kind, data))
+        try:
+            content = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # mark as recently used for pruning
+        except OSError:
+            pass
+        return content
+
+    def put(self, kind: str, data: bytes, content: bytes) -> None:
+        path = self._path(self.key(kind, data))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(content)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[cache] Could not store {path}: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune()
+
+    def clear_stale(self) -> None:
+        """Remove entries written by other versions (only version directories under ``root``)."""
+        current = self.directory.name
+        try:
+            children = list(self.root.iterdir())
+        except OSError:
+            return
+        for path in children:
+            if path.name != current and path.is_dir() and _VERSION_DIR.fullmatch(path.name):
+                shutil.rmtree(path, ignore_errors=True)
+                print(f"[cache] Removed stale cache {path}")
+
+    def prune(self) -> None:
+        entries = []
+        total = 0
+        for path in self.directory.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,687 @@
+from __future__ import annotations
+
+import hashlib
+import html
+import json
+import os
+import re
+import struct
+import tempfile
+import threading
+from functools import lru_cache
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Code points whose advance widths are precomputed per font: Basic Latin,
+# Latin-1, Latin Extended-A/B (Turkish letters included) and common
+# typographic punctuation. Anything else uses the font's average width.
+_TABLE_RANGES = ((0x20, 0x250), (0x2010, 0x2027), (0x20AC, 0x20AD))
+
+CACHE_VERSION = 1
+LINE_HEIGHT = 1.2  # mxConstants.LINE_HEIGHT
+
+_FONT_SUFFIXES = (".ttf", ".otf", ".ttc")
+
+# draw.io's default fonts mapped to metric-compatible fonts commonly
+# installed on Linux hosts.
+FONT_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "helvetica": ("arial", "liberation sans", "nimbus sans", "dejavu sans"),
+    "arial": ("liberation sans", "nimbus sans", "helvetica", "dejavu sans"),
+    "verdana": ("dejavu sans", "bitstream vera sans"),
+    "times new roman": ("liberation serif", "nimbus roman", "dejavu serif"),
+    "courier new": ("liberation mono", "nimbus mono ps", "dejavu sans mono"),
+}
+
+# Helvetica advance widths (1/1000 em) for U+0020..U+007E, used when no
+# matching font file is installed.
+_HELVETICA_ASCII = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+
+
+def default_font_dirs() -> List[Path]:
+    """Font directories to scan; ``DIAGRAM_FONT_DIRS`` (os.pathsep separated) overrides."""
+    override = os.environ.get("DIAGRAM_FONT_DIRS")
+    if override:
+        return [Path(p) for p in override.split(os.pathsep) if p]
+    dirs = [
+        Path("/usr/share/fonts"),
+        Path("/usr/local/share/fonts"),
+        Path.home() / ".fonts",
+        Path.home() / ".local/share/fonts",
+        Path("/Library/Fonts"),
+        Path("/System/Library/Fonts"),
+    ]
+    windir = os.environ.get("WINDIR")
+    if windir:
+        dirs.append(Path(windir) / "Fonts")
+    return dirs
+
+
+def default_cache_file() -> Path:
+    override = os.environ.get("DIAGRAM_FONT_CACHE")
+    if override:
+        return Path(override)
+    return Path.home() / ".cache" / "diagram-vector-pipeline" / "font-metrics.json"
+
+
+class FontMetrics:
+    """Advance widths of one font face, in em units (multiply by font size)."""
+
+    __slots__ = ("family", "bold", "italic", "ascent", "descent", "widths", "default")
+
+    def __init__(
+        self,
+        family: str,
+        bold: bool,
+        italic: bool,
+        ascent: float,
+        descent: float,
+        widths: Dict[str, float],
+        default: float,
+    ) -> None:
+        self.family = family
+        self.bold = bold
+        self.italic = italic
+        self.ascent = ascent
+        self.descent = descent
+        self.widths = widths
+        self.default = default
+
+    def measure(self, text: str, size: float) -> float:
+        widths = self.widths
+        default = self.default
+        return sum(widths.get(ch, default) for ch in text) * size
+
+    def to_json(self) -> dict:
+        return {
+            "family": self.family,
+            "bold": self.bold,
+            "italic": self.italic,
+            "ascent": self.ascent,
+            "descent": self.descent,
+            "widths": self.widths,
+            "default": self.default,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "FontMetrics":
+        return cls(
+            data["family"],
+            data["bold"],
+            data["italic"],
+            data["ascent"],
+            data["descent"],
+            data["widths"],
+            data["default"],
+        )
+
+
+def _builtin_metrics(bold: bool, italic: bool) -> FontMetrics:
+    # Bold Helvetica is roughly 6% wider; italics keep the regular advances.
+    scale = 1.06 if bold else 1.0
+    widths = {
+        chr(0x20 + i): round(w * scale / 1000, 4) for i, w in enumerate(_HELVETICA_ASCII)
+    }
+    return FontMetrics("Helvetica", bold, italic, 0.77, 0.23, widths, round(0.556 * scale, 4))
+
+
+# --------------------------------------------------------------------------
+# Minimal sfnt (TrueType/OpenType) reader: name, head, hhea, hmtx and cmap.
+# --------------------------------------------------------------------------
+
+def _sfnt_tables(data: bytes) -> Dict[str, int]:
+    offset = 0
+    if data[:4] == b"ttcf":
+        # Font collections: use the first face.
+        offset = struct.unpack_from(">I", data, 12)[0]
+    num_tables = struct.unpack_from(">H", data, offset + 4)[0]
+    tables: Dict[str, int] = {}
+    for i in range(num_tables):
+        tag, _checksum, table_offset, _length = struct.unpack_from(">4sIII", data, offset + 12 + 16 * i)
+        tables[tag.decode("latin-1")] = table_offset
+    return tables
+
+
+def _sfnt_names(data: bytes, offset: int) -> Dict[int, str]:
+    _fmt, count, string_offset = struct.unpack_from(">HHH", data, offset)
+    names: Dict[int, str] = {}
+    for i in range(count):
+        platform, encoding, language, name_id, length, str_offset = struct.unpack_from(
+            ">HHHHHH", data, offset + 6 + 12 * i
+        )
+        if name_id not in (1, 2, 16, 17):
+            continue
+        raw = data[offset + string_offset + str_offset:offset + string_offset + str_offset + length]
+        if platform == 3 and language == 0x409:
+            names[name_id] = raw.decode("utf-16-be", "replace")
+        elif platform == 1 and encoding == 0 and name_id not in names:
+            names[name_id] = raw.decode("latin-1")
+    return names
+
+
+def _cmap_lookup(data: bytes, offset: int) -> Dict[int, int]:
+    """Map the precomputed code points to glyph ids using a Unicode cmap subtable."""
+    wanted = [cp for start, stop in _TABLE_RANGES for cp in range(start, stop)]
+    num_subtables = struct.unpack_from(">H", data, offset + 2)[0]
+    subtables: Dict[Tuple[int, int], int] = {}
+    for i in range(num_subtables):
+        platform, encoding, sub_offset = struct.unpack_from(">HHI", data, offset + 4 + 8 * i)
+        subtables[(platform, encoding)] = offset + sub_offset
+
+    for key in ((3, 10), (0, 4), (3, 1), (0, 3)):
+        sub = subtables.get(key)
+        if sub is None:
+            continue
+        fmt = struct.unpack_from(">H", data, sub)[0]
+        if fmt == 12:
+            n_groups = struct.unpack_from(">I", data, sub + 12)[0]
+            groups = [struct.unpack_from(">III", data, sub + 16 + 12 * i) for i in range(n_groups)]
+            glyphs = {}
+            for cp in wanted:
+                for start, end, glyph in groups:
+                    if start <= cp <= end:
+                        glyphs[cp] = glyph + cp - start
+                        break
+            return glyphs
+        if fmt == 4:
+            seg_count = struct.unpack_from(">H", data, sub + 6)[0] // 2
+            ends = struct.unpack_from(f">{seg_count}H", data, sub + 14)
+            starts_at = sub + 16 + 2 * seg_count
+            starts = struct.unpack_from(f">{seg_count}H", data, starts_at)
+            deltas = struct.unpack_from(f">{seg_count}h", data, starts_at + 2 * seg_count)
+            range_at = starts_at + 4 * seg_count
+            range_offsets = struct.unpack_from(f">{seg_count}H", data, range_at)
+            glyphs = {}
+            for cp in wanted:
+                for seg in range(seg_count):
+                    if cp > ends[seg]:
+                        continue
+                    if cp < starts[seg]:
+                        break
+                    if range_offsets[seg] == 0:
+                        glyph = (cp + deltas[seg]) & 0xFFFF
+                    else:
+                        at = range_at + 2 * seg + range_offsets[seg] + 2 * (cp - starts[seg])
+                        glyph = struct.unpack_from(">H", data, at)[0]
+                        if glyph:
+                            glyph = (glyph + deltas[seg]) & 0xFFFF
+                    if glyph:
+                        glyphs[cp] = glyph
+                    break
+            return glyphs
+    return {}
+
+
+def read_font_metrics(path: Path) -> Optional[FontMetrics]:
+    """Build the advance-width table of a font file, or None if it cannot be read."""
+    try:
+        data = path.read_bytes()
+        tables = _sfnt_tables(data)
+        if not all(tag in tables for tag in ("name", "head", "hhea", "hmtx", "cmap")):
+            return None
+        names = _sfnt_names(data, tables["name"])
+        family = names.get(16) or names.get(1)
+        if not family:
+            return None
+        subfamily = (names.get(17) or names.get(2) or "").lower()
+
+        units_per_em = struct.unpack_from(">H", data, tables["head"] + 18)[0]
+        ascent, descent = struct.unpack_from(">hh", data, tables["hhea"] + 4)
+        num_metrics = struct.unpack_from(">H", data, tables["hhea"] + 34)[0]
+        advances = struct.unpack_from(f">{num_metrics * 2}H", data, tables["hmtx"])[::2]
+
+        widths: Dict[str, float] = {}
+        for cp, glyph in _cmap_lookup(data, tables["cmap"]).items():
+            advance = advances[min(glyph, num_metrics - 1)]
+            widths[chr(cp)] = round(advance / units_per_em, 4)
+    except (OSError, struct.error, IndexError, ZeroDivisionError):
+        return None
+
+    if not widths:
+        return None
+    lower = [widths[ch] for ch in "abcdefghijklmnopqrstuvwxyz" if ch in widths]
+    default = round(sum(lower) / len(lower), 4) if lower else widths.get(" ", 0.5) * 2
+    return FontMetrics(
+        family,
+        "bold" in subfamily or "black" in subfamily,
+        "italic" in subfamily or "oblique" in subfamily,
+        round(ascent / units_per_em, 4),
+        round(abs(descent) / units_per_em, 4),
+        widths,
+        default,
+    )
+
+
+class FontRegistry:
+    """
+    Advance-width tables for the fonts installed on this host.
+
+    Tables are built once per font file and memoized to ``cache_file``;
+    files whose size and mtime are unchanged are not parsed again.
+    ``fingerprint`` changes whenever a font file is added, removed or changed.
+    """
+
+    def __init__(
+        self,
+        font_dirs: Optional[Iterable[Path]] = None,
+        cache_file: Optional[Path] = None,
+    ) -> None:
+        self.font_dirs = list(font_dirs) if font_dirs is not None else default_font_dirs()
+        self.cache_file = cache_file if cache_file is not None else default_cache_file()
+        self._faces: Dict[Tuple[str, bool, bool], FontMetrics] = {}
+        self._lookups: Dict[Tuple[str, bool, bool], FontMetrics] = {}
+        self.fingerprint = ""
+        self._load()
+
+    def _font_files(self) -> List[Path]:
+        files: List[Path] = []
+        for directory in self.font_dirs:
+            if directory.is_dir():
+                files.extend(
+                    p for p in directory.rglob("*") if p.suffix.lower() in _FONT_SUFFIXES
+                )
+        return sorted(files)
+
+    def _read_cache(self) -> Dict[str, dict]:
+        try:
+            data = json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CACHE_VERSION:
+            return {}
+        return data.get("fonts", {})
+
+    def _write_cache(self, fonts: Dict[str, dict]) -> None:
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_file.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump({"version": CACHE_VERSION, "fonts": fonts}, handle)
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            print(f"[fonts] Could not write font metrics cache {self.cache_file}: {e}")
+
+    def _load(self) -> None:
+        cached = self._read_cache()
+        fonts: Dict[str, dict] = {}
+        parsed = 0
+        for path in self._font_files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            key = str(path)
+            entry = cached.get(key)
+            if entry is None or entry["mtime"] != stat.st_mtime or entry["size"] != stat.st_size:
+                metrics = read_font_metrics(path)
+                parsed += 1
+                entry = {
+                    "mtime": stat.st_mtime,
+                    "size": stat.st_size,
+                    "metrics": metrics.to_json() if metrics else None,
+                }
+            fonts[key] = entry
+            if entry["metrics"] is not None:
+                metrics = FontMetrics.from_json(entry["metrics"])
+                self._faces.setdefault((metrics.family.lower(), metrics.bold, metrics.italic), metrics)
+
+        if parsed or fonts.keys() != cached.keys():
+            self._write_cache(fonts)
+        self.fingerprint = hashlib.sha256(
+            json.dumps([(key, entry["mtime"], entry["size"]) for key, entry in sorted(fonts.items())]).encode("utf-8")
+        ).hexdigest()[:16]
+        print(f"[fonts] {len(self._faces)} font faces loaded ({parsed} parsed, {len(fonts) - parsed} cached)")
+
+    def font(self, family: str, bold: bool = False, italic: bool = False) -> FontMetrics:
+        """
+        Metrics for a CSS-like family list (``"Verdana, sans-serif"``).
+
+        Falls back to aliases, then the regular face of the family, then the
+        built-in Helvetica table.
+        """
+        key = (family, bold, italic)
+        found = self._lookups.get(key)
+        if found is not None:
+            return found
+
+        candidates: List[str] = []
+        for name in family.split(","):
+            name = name.strip().strip("'\"").lower()
+            if name:
+                candidates.append(name)
+                candidates.extend(FONT_ALIASES.get(name, ()))
+        candidates.extend(FONT_ALIASES["helvetica"])
+
+        found = None
+        for styles in ((bold, italic), (bold, False), (False, False)):
+            for name in candidates:
+                found = self._faces.get((name, *styles))
+                if found is not None:
+                    break
+            if found is not None:
+                break
+        if found is None:
+            found = _builtin_metrics(bold, italic)
+        self._lookups[key] = found
+        return found
+
+
+_registry: Optional[FontRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> FontRegistry:
+    """Process-wide font registry, built on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = FontRegistry()
+    return _registry
+
+
+# --------------------------------------------------------------------------
+# Label layout
+# --------------------------------------------------------------------------
+
+# draw.io fontStyle bit flags.
+FONT_BOLD = 1
+FONT_ITALIC = 2
+FONT_UNDERLINE = 4
+
+
+class Run(NamedTuple):
+    text: str
+    bold: bool
+    italic: bool
+    underline: bool
+    color: Optional[str]
+    size: Optional[float]  # None: the label's font size
+    family: Optional[str]  # None: the label's font family
+    width: float
+
+
+class Line(NamedTuple):
+    runs: Tuple[Run, ...]
+    width: float
+    height: float
+    baseline: float  # offset of the baseline from the top of the line
+
+
+class LabelLayout(NamedTuple):
+    lines: Tuple[Line, ...]
+    width: float
+    height: float
+
+
+# (text, bold, italic, underline, color, size, family)
+_Span = Tuple[str, bool, bool, bool, Optional[str], Optional[float], Optional[str]]
+
+# ASCII whitespace only: &nbsp; must neither collapse nor allow a line break.
+_SPACE_RE = re.compile(r"[ \t\r\n\f]+")
+_TOKEN_RE = re.compile(r"[ \t\r\n\f]+|[^ \t\r\n\f]+")
+_BLOCK_TAGS = {"div", "p", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "ul", "ol", "table"}
+
+# Pixel sizes of <font size="1".."7">, as rendered by browsers.
+_FONT_TAG_SIZES = (10.0, 13.0, 16.0, 18.0, 24.0, 32.0, 48.0)
+_CSS_LENGTH_RE = re.compile(r"([0-9]*\.?[0-9]+)(px|pt|em|%)?")
+
+
+def _css_size(value: str, current: float) -> Optional[float]:
+    match = _CSS_LENGTH_RE.fullmatch(value.strip().lower())
+    if match is None:
+        return None
+    number, unit = float(match.group(1)), match.group(2)
+    if unit == "pt":
+        return number * 4 / 3
+    if unit == "em":
+        return number * current
+    if unit == "%":
+        return number * current / 100
+    return number
+
+
+def _font_tag_size(value: str) -> Optional[float]:
+    value = value.strip()
+    try:
+        index = 3 + int(value) if value[:1] in "+-" else int(value)
+    except ValueError:
+        return None
+    return _FONT_TAG_SIZES[min(max(index, 1), 7) - 1]
+
+
+class _LabelParser(HTMLParser):
+    """Splits the HTML subset used by draw.io labels into styled paragraphs."""
+
+    def __init__(self, bold: bool, italic: bool, underline: bool, size: float) -> None:
+        super().__init__(convert_charrefs=True)
+        self.paragraphs: List[List[_Span]] = [[]]
+        self._size = size
+        self._stack: List[Tuple[str, bool, bool, bool, Optional[str], Optional[float], Optional[str]]] = []
+        self._state: Tuple[bool, bool, bool, Optional[str], Optional[float], Optional[str]] = (
+            bold,
+            italic,
+            underline,
+            None,
+            None,
+            None,
+        )
+
+    def _break(self) -> None:
+        if self.paragraphs[-1]:
+            self.paragraphs.append([])
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == "br":
+            self.paragraphs.append([])
+            return
+        if tag in _BLOCK_TAGS:
+            self._break()
+        bold, italic, underline, color, size, family = self._state
+        if tag in ("b", "strong") or tag.startswith("h") and tag[1:].isdigit():
+            bold = True
+        elif tag in ("i", "em"):
+            italic = True
+        elif tag == "u":
+            underline = True
+        attributes = dict(attrs)
+        if tag == "font":
+            if attributes.get("color"):
+                color = attributes["color"]
+            if attributes.get("face"):
+                family = attributes["face"]
+            if attributes.get("size"):
+                size = _font_tag_size(attributes["size"]) or size
+        for decl in (attributes.get("style") or "").split(";"):
+            name, _, value = decl.partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "font-weight" and value.lower() in ("bold", "700"):
+                bold = True
+            elif name == "font-style" and value.lower() == "italic":
+                italic = True
+            elif name == "text-decoration" and "underline" in value.lower():
+                underline = True
+            elif name == "color" and value:
+                color = value.replace(" ", "").lower()
+            elif name == "font-size":
+                size = _css_size(value, size or self._size) or size
+            elif name == "font-family" and value:
+                family = value
+        self._stack.append((tag, *self._state))
+        self._state = (bold, italic, underline, color, size, family)
+
+    def handle_endtag(self, tag: str) -> None:
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                self._state = self._stack[index][1:]
+                del self._stack[index:]
+                break
+        if tag in _BLOCK_TAGS:
+            self._break()
+
+    def handle_data(self, data: str) -> None:
+        self.paragraphs[-1].append((data, *self._state))
+
+
+def _paragraphs(value: str, is_html: bool, font_style: int, size: float) -> List[List[_Span]]:
+    bold = bool(font_style & FONT_BOLD)
+    italic = bool(font_style & FONT_ITALIC)
+    underline = bool(font_style & FONT_UNDERLINE)
+    if not is_html:
+        return [[(line, bold, italic, underline, None, None, None)] for line in value.split("\n")]
+
+    if "<" in value or "&" in value:
+        parser = _LabelParser(bold, italic, underline, size)
+        parser.feed(value)
+        parser.close()
+        parsed = parser.paragraphs
+    else:
+        parsed = [[(value, bold, italic, underline, None, None, None)]]
+
+    paragraphs = []
+    for spans in parsed:
+        # HTML collapses whitespace and trims it at line edges.
+        collapsed = [(_SPACE_RE.sub(" ", text), *rest) for text, *rest in spans]
+        if collapsed:
+            first = collapsed[0]
+            collapsed[0] = (first[0].lstrip(), *first[1:])
+            last = collapsed[-1]
+            collapsed[-1] = (last[0].rstrip(), *last[1:])
+        paragraphs.append([span for span in collapsed if span[0]])
+    while paragraphs and not paragraphs[-1]:
+        paragraphs.pop()
+    return paragraphs
+
+
+def _extents(font: FontMetrics, size: float) -> Tuple[float, float]:
+    """Space above and below the baseline of text in ``font``, half-leading included."""
+    em_height = font.ascent + font.descent or 1.0
+    above = (size * LINE_HEIGHT - size) / 2 + size * font.ascent / em_height
+    return above, size * LINE_HEIGHT - above
+
+
+def _make_line(pieces: List[Tuple[str, _Span, float, Tuple[float, float]]], strut: Tuple[float, float]) -> Line:
+    """
+    Merge ``pieces`` (token, span, width, extents) into runs. As in CSS, the
+    line is tall enough for its tallest run and the label's own font.
+    """
+    while pieces and _SPACE_RE.fullmatch(pieces[-1][0]):
+        pieces.pop()
+    runs: List[Run] = []
+    above, below = strut
+    for text, span, width, (run_above, run_below) in pieces:
+        _, bold, italic, underline, color, size, family = span
+        above, below = max(above, run_above), max(below, run_below)
+        if runs and runs[-1][1:7] == (bold, italic, underline, color, size, family):
+            prev = runs[-1]
+            runs[-1] = prev._replace(text=prev.text + text, width=prev.width + width)
+        else:
+            runs.append(Run(text, bold, italic, underline, color, size, family, width))
+    return Line(tuple(runs), sum(run.width for run in runs), above + below, above)
+
+
+@lru_cache(maxsize=16384)
+def layout_label(
+    value: str,
+    family: str,
+    size: float,
+    max_width: Optional[float] = None,
+    is_html: bool = False,
+    font_style: int = 0,
+) -> LabelLayout:
+    """
+    Break a label into measured lines.
+
+    ``max_width`` enables greedy word wrapping (``whiteSpace=wrap``); words
+    wider than the box overflow instead of being split. Runs with their own
+    font size or family (HTML labels) are measured in that font. Results are
+    cached per (text, font, size, width).
+    """
+    registry = get_registry()
+    strut = _extents(registry.font(family, bool(font_style & FONT_BOLD), bool(font_style & FONT_ITALIC)), size)
+    lines: List[Line] = []
+    for spans in _paragraphs(value, is_html, font_style, size):
+        pieces: List[Tuple[str, _Span, float, Tuple[float, float]]] = []
+        used = 0.0
+        for span in spans:
+            span_size = span[5] or size
+            font = registry.font(span[6] or family, span[1], span[2])
+            extents = _extents(font, span_size)
+            for token in _TOKEN_RE.findall(span[0]) if max_width is not None else [span[0]]:
+                width = font.measure(token, span_size)
+                if (
+                    max_width is not None
+                    and pieces
+                    and not _SPACE_RE.fullmatch(token)
+                    and used + width > max_width
+                ):
+                    lines.append(_make_line(pieces, strut))
+                    pieces, used = [], 0.0
+                if not pieces and _SPACE_RE.fullmatch(token):
+                    continue
+                pieces.append((token, span, width, extents))
+                used += width
+        lines.append(_make_line(pieces, strut))
+
+    return LabelLayout(
+        tuple(lines),
+        max((line.width for line in lines), default=0.0),
+        sum(line.height for line in lines),
+    )
+
+
+def svg_text(
+    layout: LabelLayout,
+    left: float,
+    top: float,
+    box_width: float,
+    align: str,
+    family: str,
+    size: float,
+    color: str,
+) -> str:
+    """
+    SVG <text> for a laid-out label inside a box starting at (left, top).
+
+    Every line is positioned explicitly (no text-anchor) so SVG viewers and
+    the SVG -> EMF conversion place text identically.
+    """
+    if not layout.lines:
+        return ""
+    parts: List[str] = []
+    line_top = top
+    for line in layout.lines:
+        if align == "left":
+            x = left
+        elif align == "right":
+            x = left + box_width - line.width
+        else:
+            x = left + (box_width - line.width) / 2
+        y = line_top + line.baseline
+        line_top += line.height
+        for position, run in enumerate(line.runs):
+            attrs = f' x="{x:.2f}" y="{y:.2f}"' if position == 0 else ""
+            if run.size is not None:
+                attrs += f' font-size="{run.size:g}"'
+            if run.family is not None:
+                attrs += f' font-family="{html.escape(run.family, quote=True)}"'
+            if run.bold:
+                attrs += ' font-weight="bold"'
+            if run.italic:
+                attrs += ' font-style="italic"'
+            if run.underline:
+                attrs += ' text-decoration="underline"'
+            if run.color:
+                attrs += f' fill="{html.escape(run.color, quote=True)}"'
+            parts.append(f"<tspan{attrs}>{html.escape(run.text)}</tspan>")
+    return (
+        f'<text xml:space="preserve" font-family="{html.escape(family, quote=True)}" '
+        f'font-size="{size:g}" fill="{color}">{"".join(parts)}</text>'
+    )
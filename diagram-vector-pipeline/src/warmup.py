@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import importlib
+import shutil
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Optional
+
+# Reference point for the reported startup time when the caller does not
+# pass one (first import of this module, i.e. while the API is loading).
+_IMPORTED_AT = time.perf_counter()
+
+# Relative names resolve against this package (``src`` in the container).
+_MODULES = (
+    "numpy",
+    ".edge_routing",
+    ".text_layout",
+    ".mxgraph_render",
+    ".render_cache",
+    ".convert_drawio_to_svg",
+    ".convert_svg_to_emf",
+)
+
+# Small diagram exercising labels, perimeter ports and orthogonal routing.
+_SAMPLE_DIAGRAM = """
+<mxGraphModel gridSize="10" pageWidth="400" pageHeight="200">
+  <root>
+    <mxCell id="0" />
+    <mxCell id="1" parent="0" />
+    <mxCell id="a" value="&lt;b&gt;Warm&lt;/b&gt; up" parent="1" vertex="1"
+            style="rounded=1;whiteSpace=wrap;html=1;fontFamily=Verdana;fontSize=12;">
+      <mxGeometry x="20" y="20" width="120" height="60" as="geometry" />
+    </mxCell>
+    <mxCell id="b" value="Ready" parent="1" vertex="1"
+            style="ellipse;html=1;verticalLabelPosition=bottom;verticalAlign=top;rotation=-90;">
+      <mxGeometry x="240" y="100" width="80" height="40" as="geometry" />
+    </mxCell>
+    <mxCell id="e" parent="1" edge="1" source="a" target="b"
+            style="edgeStyle=orthogonalEdgeStyle;exitX=1;exitY=0.5;entryX=0;entryY=0.5;">
+      <mxGeometry relative="1" as="geometry" />
+    </mxCell>
+  </root>
+</mxGraphModel>
+"""
+
+
+class _State:
+    def __init__(self) -> None:
+        self.ready = False
+        self.running = False
+        self.startup_seconds: Optional[float] = None
+        self.phases: Dict[str, float] = {}
+        self.tools: Dict[str, bool] = {}
+        self.error: Optional[str] = None
+        self.lock = threading.Lock()
+
+
+state = _State()
+
+
+def is_ready() -> bool:
+    return state.ready
+
+
+def warm_up(started_at: Optional[float] = None) -> None:
+    """
+    Pay every first-request cost up front: import the conversion modules,
+    load the font metric tables, render a sample diagram and run the
+    external converters once (Inkscape builds its font cache on first use).
+
+    Safe to call more than once; only the first call does the work.
+    """
+    with state.lock:
+        if state.ready or state.running:
+            return
+        state.running = True
+
+    started = started_at if started_at is not None else _IMPORTED_AT
+    phases: Dict[str, float] = {}
+    tools: Dict[str, bool] = {}
+    error: Optional[str] = None
+
+    def phase(name: str, since: float) -> float:
+        now = time.perf_counter()
+        phases[name] = round(now - since, 3)
+        return now
+
+    try:
+        # Modules already imported by the caller (the API app) count too.
+        mark = started
+        modules = {name.lstrip("."): importlib.import_module(name, __package__) for name in _MODULES}
+        mark = phase("imports", mark)
+
+        modules["text_layout"].get_registry()
+        mark = phase("fonts", mark)
+
+        svg = modules["mxgraph_render"].render_svg(ET.fromstring(_SAMPLE_DIAGRAM), "warmup.drawio")
+        mark = phase("render", mark)
+
+        tools["inkscape"] = shutil.which("inkscape") is not None
+        if tools["inkscape"]:
+            with tempfile.TemporaryDirectory(prefix="drawio-warmup-") as tmp:
+                svg_path = Path(tmp) / "warmup.svg"
+                svg_path.write_text(svg, encoding="utf-8")
+                tools["inkscape"] = modules["convert_svg_to_emf"].convert_svg_to_emf(
+                    svg_path, Path(tmp) / "warmup.emf"
+                )
+        tools["libreoffice"] = shutil.which("libreoffice") is not None
+        phase("tools", mark)
+    except Exception as e:
+        # Conversions may still work; report the failure instead of never
+        # becoming ready.
+        error = f"{type(e).__name__}: {e}"
+        print(f"[warmup] Warm-up failed: {error}")
+
+    with state.lock:
+        state.phases = phases
+        state.tools = tools
+        state.error = error
+        state.startup_seconds = round(time.perf_counter() - started, 3)
+        state.ready = True
+        state.running = False
+
+    summary = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in phases.items())
+    print(f"[warmup] Ready after {state.startup_seconds:.3f}s ({summary}); tools: {tools}")
+
+
+def start_background_warm_up() -> None:
+    """Warm up in a thread so /health can answer 503 until it finishes."""
+    if state.ready or state.running:
+        return
+    threading.Thread(target=warm_up, name="warmup", daemon=True).start()
@@ -0,0 +1,167 @@
+"""
+Benchmark a one-cell edit on a large diagram: full render vs. RenderCache,
+with the previous revision in memory or rendered by another worker.
+
+Usage (from diagram-vector-pipeline/):
+    python tools/bench_incremental.py [--cells 10000] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from mxgraph_render import render_svg  # noqa: E402
+from render_cache import RenderCache  # noqa: E402
+from shared_cache import DiskCache  # noqa: E402
+
+
+def build_model(cells: int, moved_x: int = 0) -> ET.Element:
+    """
+    Grid of vertices, each connected to its right-hand neighbour; every
+    other edge is orthogonal. Below the grid an orthogonal edge joins two
+    far-apart shapes, and the edit moves a note from beside that lane into
+    it, so the edge must be re-routed although neither end changed.
+    """
+    vertices = cells // 2 - 2
+    columns = 100
+    lane_y = (vertices // columns + 2) * 100
+    note_x = 800 + moved_x if moved_x else 2000
+    parts = ['<mxGraphModel pageWidth="20000" pageHeight="20000"><root>',
+             '<mxCell id="0"/>', '<mxCell id="1" parent="0"/>',
+             f'<mxCell id="lane-a" value="A" parent="1" vertex="1" style="html=1;">'
+             f'<mxGeometry x="0" y="{lane_y}" width="120" height="200" as="geometry"/></mxCell>',
+             f'<mxCell id="lane-b" value="B" parent="1" vertex="1" style="html=1;">'
+             f'<mxGeometry x="1600" y="{lane_y}" width="120" height="200" as="geometry"/></mxCell>',
+             f'<mxCell id="note" value="Note" parent="1" vertex="1" style="shape=note;html=1;">'
+             f'<mxGeometry x="{note_x}" y="{lane_y + 40}" width="160" height="120" as="geometry"/></mxCell>',
+             '<mxCell id="lane" parent="1" edge="1" source="lane-a" target="lane-b" '
+             'style="edgeStyle=orthogonalEdgeStyle;endArrow=classic;html=1;">'
+             '<mxGeometry relative="1" as="geometry"/></mxCell>']
+    for i in range(vertices):
+        x = (i % columns) * 160
+        y = (i // columns) * 100
+        parts.append(
+            f'<mxCell id="v{i}" value="Node {i}" parent="1" vertex="1" '
+            f'style="rounded=1;whiteSpace=wrap;html=1;fontFamily=Verdana;fontSize=12;">'
+            f'<mxGeometry x="{x}" y="{y}" width="120" height="60" as="geometry"/></mxCell>'
+        )
+    for i in range(cells - vertices - 6):
+        style = "edgeStyle=orthogonalEdgeStyle;" if i % 2 else ""
+        parts.append(
+            f'<mxCell id="e{i}" parent="1" edge="1" source="v{i}" target="v{(i + 1) % vertices}" '
+            f'style="{style}endArrow=classic;html=1;">'
+            f'<mxGeometry relative="1" as="geometry"/></mxCell>'
+        )
+    parts.append("</root></mxGraphModel>")
+    return ET.fromstring("".join(parts))
+
+
+def shapes_model(shapes: Dict[str, Tuple[float, float, float, float]]) -> ET.Element:
+    """Unstyled shapes and one labelled orthogonal edge from ``A`` to ``B``."""
+    parts = ['<mxGraphModel><root><mxCell id="0"/><mxCell id="1" parent="0"/>']
+    for cell_id, (x, y, width, height) in shapes.items():
+        parts.append(
+            f'<mxCell id="{cell_id}" value="" parent="1" vertex="1">'
+            f'<mxGeometry x="{x}" y="{y}" width="{width}" height="{height}" as="geometry"/></mxCell>'
+        )
+    parts.append(
+        '<mxCell id="e" parent="1" edge="1" source="A" target="B" style="edgeStyle=orthogonalEdgeStyle;">'
+        '<mxGeometry relative="1" as="geometry"/></mxCell>'
+        '<mxCell id="e-label" value="label" parent="e" vertex="1" connectable="0" style="edgeLabel;html=1;">'
+        '<mxGeometry x="-0.5" y="10" relative="1" as="geometry"/></mxCell></root></mxGraphModel>'
+    )
+    return ET.fromstring("".join(parts))
+
+
+# Revision pairs whose second revision changes a route without touching its
+# terminals: (shapes, shapes added or moved by the edit).
+ROUTING_EDITS = [
+    # A shape off the diagram grid fills a grid cell the top detour runs
+    # through without overlapping the detour itself.
+    (
+        {"A": (0, 3, 40, 40), "B": (200, 3, 40, 40), "C": (100, -10, 40, 70)},
+        {"D": (100, -40, 40, 22)},
+    ),
+    # A shape taller than every candidate detour; the edge takes a lane
+    # above it, which the edit then blocks.
+    (
+        {"A": (0, 0, 40, 40), "B": (300, 0, 40, 40), "C": (150, -100, 40, 240)},
+        {"D": (200, -120, 40, 30)},
+    ),
+]
+
+
+def check_routing_edits() -> None:
+    """Incremental renders must match full renders for edits near routes."""
+    for shapes, edit in ROUTING_EDITS:
+        cache = RenderCache()
+        cache.render("check", shapes_model(shapes), "check.drawio")
+        revision = shapes_model({**shapes, **edit})
+        assert cache.render("check", revision, "check.drawio") == render_svg(revision, "check.drawio"), edit
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cells", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    check_routing_edits()
+
+    base = build_model(args.cells)
+    edits = [build_model(args.cells, moved_x=10 * (n + 1)) for n in range(args.repeat)]
+
+    full = best_of(args.repeat, lambda: render_svg(edits[0], "bench.drawio"))
+
+    cache = RenderCache()
+    cache.render("bench", base, "bench.drawio")
+    revisions = iter(edits)
+    incremental = best_of(args.repeat, lambda: cache.render("bench", next(revisions), "bench.drawio"))
+
+    # The cached output must match a fresh full render of the same revision.
+    assert cache.render("bench", edits[-1], "bench.drawio") == render_svg(edits[-1], "bench.drawio")
+
+    # Two workers sharing a store take turns, so every edit starts from the
+    # revision the other one wrote.
+    with tempfile.TemporaryDirectory() as directory:
+        store = DiskCache(Path(directory), version=lambda: "bench")
+        workers = [RenderCache(store=store), RenderCache(store=store)]
+        workers[0].render("bench", base, "bench.drawio")
+        workers[0].flush()
+        timings = []
+        for index, revision in enumerate(edits):
+            worker = workers[(index + 1) % 2]
+            start = time.perf_counter()
+            output = worker.render("bench", revision, "bench.drawio")
+            timings.append(time.perf_counter() - start)
+            worker.flush()
+        shared = min(timings)
+        assert sum(worker.stats()["shared_hits"] for worker in workers) == len(edits)
+        assert output == render_svg(edits[-1], "bench.drawio")
+
+    print(f"[bench] cells={args.cells}")
+    print(f"[bench] full render:        {full * 1000:8.1f} ms")
+    print(f"[bench] one-cell edit:      {incremental * 1000:8.1f} ms")
+    print(f"[bench] via shared store:   {shared * 1000:8.1f} ms")
+    print(f"[bench] speedup:            {full / incremental:8.1f}x (shared: {full / shared:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
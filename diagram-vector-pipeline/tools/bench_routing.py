@@ -0,0 +1,70 @@
+"""
+Benchmark batch orthogonal routing of edges without waypoints.
+
+Usage (from diagram-vector-pipeline/):
+    python tools/bench_routing.py [--edges 5000] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from edge_routing import EdgeRouter  # noqa: E402
+from mxgraph_render import orthogonal_routes, parse_cells  # noqa: E402
+
+
+def build_model(edges: int) -> ET.Element:
+    """Grid of vertices; each edge connects a vertex to one two rows down."""
+    columns = 100
+    vertices = edges + 2 * columns + 1
+    parts = ['<mxGraphModel gridSize="10"><root>', '<mxCell id="0"/>', '<mxCell id="1" parent="0"/>']
+    for i in range(vertices):
+        parts.append(
+            f'<mxCell id="v{i}" value="" parent="1" vertex="1" style="rounded=0;">'
+            f'<mxGeometry x="{(i % columns) * 160}" y="{(i // columns) * 100}" width="120" height="60" as="geometry"/>'
+            f"</mxCell>"
+        )
+    for i in range(edges):
+        parts.append(
+            f'<mxCell id="e{i}" parent="1" edge="1" source="v{i}" target="v{i + 2 * columns + 1}" '
+            f'style="edgeStyle=orthogonalEdgeStyle;exitX=1;exitY=0.5;entryX=0;entryY=0.5;">'
+            f'<mxGeometry relative="1" as="geometry"/></mxCell>'
+        )
+    parts.append("</root></mxGraphModel>")
+    return ET.fromstring("".join(parts))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--edges", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cells = parse_cells(build_model(args.edges))
+    edges = [cell for cell in cells.values() if cell.edge]
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        routes = orthogonal_routes(edges, cells, {}, EdgeRouter())
+        timings.append(time.perf_counter() - start)
+
+    router = EdgeRouter()
+    orthogonal_routes(edges, cells, {}, router)
+    start = time.perf_counter()
+    orthogonal_routes(edges, cells, {}, router)
+    cached = time.perf_counter() - start
+
+    print(f"[bench] edges={len(routes)}")
+    print(f"[bench] batch route:        {min(timings) * 1000:8.1f} ms")
+    print(f"[bench] cached re-route:    {cached * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())